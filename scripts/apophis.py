@@ -1,39 +1,59 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib
+import numpy as np
+
 matplotlib.use('Agg')  # Set non-interactive backend before importing plt
 import matplotlib.pyplot as plt
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asteroid_analysis.loaders import read_asteroid_data  # noqa: E402
 
-def main():
+
+def main(df=None):
     print("Starting Apophis analysis...")
     print("Loading asteroid data...")
 
-    # Load the CSV data
-    hazardous_neos = pd.read_csv("asteroid_data_full.csv")
-
-    # Convert necessary columns
-    hazardous_neos['close_approach_date'] = pd.to_datetime(hazardous_neos['close_approach_date'])
-    hazardous_neos['miss_distance_km'] = pd.to_numeric(hazardous_neos['miss_distance_km'], errors='coerce')
-    hazardous_neos['diameter_km_max'] = pd.to_numeric(hazardous_neos['diameter_km_max'], errors='coerce')
-    hazardous_neos = hazardous_neos[hazardous_neos['is_potentially_hazardous_asteroid']]
+    columns = ['name', 'close_approach_date', 'miss_distance_km', 'diameter_km_max']
+    if df is None:
+        # Load only the hazardous rows and the columns this plot needs
+        hazardous_neos = read_asteroid_data(
+            Path("asteroid_data_full.csv"),
+            columns=columns,
+            date_columns=['close_approach_date'],
+            filters={'is_potentially_hazardous_asteroid': True},
+        )
+    else:
+        hazardous_neos = df.loc[df['is_potentially_hazardous_asteroid'], columns]
+        hazardous_neos = hazardous_neos.reset_index(drop=True)
 
     print(f"Processing {len(hazardous_neos)} hazardous NEOs...")
 
     # Highlight Apophis in the dataset
-    hazardous_neos['is_apophis'] = hazardous_neos['name'] == "99942 Apophis (2004 MN4)"
+    is_apophis = (hazardous_neos['name'] == "99942 Apophis (2004 MN4)").to_numpy()
+    apophis_positions = np.flatnonzero(is_apophis)
+    apophis_details = hazardous_neos.iloc[apophis_positions]
 
     print("Generating Apophis comparison plot...")
     plt.figure(figsize=(10, 6))
     plt.scatter(
         hazardous_neos['miss_distance_km'],
         hazardous_neos['diameter_km_max'],
-        c=hazardous_neos['is_apophis'].map({True: 'red', False: 'blue'}),
+        c=np.where(is_apophis, 'red', 'blue'),
         label="NEOs",
-        alpha=0.7
+        alpha=0.7,
+        rasterized=True,
+        zorder=-1,
     )
+    plt.gca().set_rasterization_zorder(0)
 
     # Find Apophis data point for annotation
-    apophis_data = hazardous_neos[hazardous_neos['is_apophis']].iloc[0]
+    apophis_data = apophis_details.iloc[0]
     plt.annotate(
         "Apophis (2029)", 
         (apophis_data['miss_distance_km'], apophis_data['diameter_km_max']), 
@@ -56,7 +76,6 @@ def main():
 
     # Print Apophis specific information
     print("\n=== Apophis Details ===")
-    apophis_details = hazardous_neos[hazardous_neos['is_apophis']]
     print(apophis_details[['name', 'close_approach_date', 'miss_distance_km', 'diameter_km_max']].to_string())
 
 
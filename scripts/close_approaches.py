@@ -1,21 +1,35 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib
+
 matplotlib.use('Agg')  # Set non-interactive backend before importing plt
 import matplotlib.pyplot as plt
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asteroid_analysis.loaders import read_asteroid_data  # noqa: E402
 
-def main():
+
+def main(df=None):
     print("Starting close approaches analysis...")
     print("Loading asteroid data...")
 
-    # Load and filter data for Apophis
-    df = pd.read_csv("asteroid_data_full.csv")
-    apophis_data = df[df['name'] == "99942 Apophis (2004 MN4)"].copy()
-
-    # Convert necessary columns
-    apophis_data['close_approach_date'] = pd.to_datetime(apophis_data['close_approach_date'])
-    apophis_data['miss_distance_km'] = pd.to_numeric(apophis_data['miss_distance_km'], errors='coerce')
-    apophis_data['diameter_km_max'] = pd.to_numeric(apophis_data['diameter_km_max'], errors='coerce')
+    name = "99942 Apophis (2004 MN4)"
+    columns = ['name', 'close_approach_date', 'miss_distance_km', 'diameter_km_max']
+    if df is None:
+        # Load only the Apophis rows and the columns this plot needs
+        apophis_data = read_asteroid_data(
+            Path("asteroid_data_full.csv"),
+            columns=columns,
+            date_columns=['close_approach_date'],
+            filters={'name': name},
+        )
+    else:
+        apophis_data = df.loc[df['name'] == name, columns].reset_index(drop=True)
 
     print(f"Processing {len(apophis_data)} Apophis close approaches...")
 
@@ -30,7 +44,7 @@ def main():
     )
 
     # Highlight the closest approach
-    closest_approach = apophis_data.loc[apophis_data['miss_distance_km'].idxmin()]
+    closest_approach = apophis_data.nsmallest(1, 'miss_distance_km').iloc[0]
     plt.scatter(
         closest_approach['close_approach_date'],
         closest_approach['miss_distance_km'],
@@ -1,24 +1,42 @@
-import pandas as pd
+import sys
+from pathlib import Path
+
 import matplotlib
+import pandas as pd
+
 matplotlib.use('Agg')  # Set non-interactive backend before importing plt
 import matplotlib.pyplot as plt
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from asteroid_analysis.loaders import read_asteroid_data  # noqa: E402
+
 # Add logging
 
 
-def main():
+def main(df=None):
     print("Starting asteroid analysis...")
     print(f"Loading data from asteroid_data_full.csv...")
 
-    # Load the CSV data
-    df = pd.read_csv("asteroid_data_full.csv")
-
-    # Preprocessing
-    # Convert columns using the correct column names
-    df['close_approach_date'] = pd.to_datetime(df['close_approach_date'])
-    df['miss_distance_km'] = pd.to_numeric(df['miss_distance_km'], errors='coerce')
-    df['diameter_km_max'] = pd.to_numeric(df['diameter_km_max'], errors='coerce')
-    df['is_potentially_hazardous_asteroid'] = df['is_potentially_hazardous_asteroid'].astype(bool)
+    columns = [
+        'name',
+        'close_approach_date',
+        'miss_distance_km',
+        'diameter_km_max',
+        'is_potentially_hazardous_asteroid',
+    ]
+    if df is None:
+        # Load the CSV data with typed columns (dates, floats and the hazard flag)
+        df = read_asteroid_data(
+            Path("asteroid_data_full.csv"),
+            columns=columns,
+            date_columns=['close_approach_date'],
+        )
+    else:
+        df = df[columns]
 
     # Filter for hazardous asteroids
     hazardous_neos = df[df['is_potentially_hazardous_asteroid']]
@@ -30,10 +48,10 @@ def main():
     # Add error handling and progress info for calculations
     try:
         print("\nCalculating closest approaches...")
-        closest_approaches = hazardous_neos.sort_values('miss_distance_km', ascending=True).head(10)
+        closest_approaches = hazardous_neos.nsmallest(10, 'miss_distance_km')
 
         print("Calculating largest asteroids...")
-        largest_asteroids = hazardous_neos.sort_values('diameter_km_max', ascending=False).head(10)
+        largest_asteroids = hazardous_neos.nlargest(10, 'diameter_km_max')
     except Exception as e:
         print(f"Error during calculations: {e}")
         raise
@@ -50,7 +68,20 @@ def main():
     print("\nGenerating visualizations...")
 
     plt.figure(figsize=(10, 6))
-    plt.scatter(hazardous_neos['miss_distance_km'], hazardous_neos['diameter_km_max'], c='red', label='Hazardous NEOs', alpha=0.7)
+    # Single-colour points: Line2D markers draw much faster than a PathCollection.
+    # Default 'o' markers keep the size and look of the scatter it replaced.
+    plt.plot(
+        hazardous_neos['miss_distance_km'].to_numpy(),
+        hazardous_neos['diameter_km_max'].to_numpy(),
+        'o',
+        linestyle='none',
+        color='red',
+        label='Hazardous NEOs',
+        alpha=0.7,
+        rasterized=True,
+        zorder=-1,
+    )
+    plt.gca().set_rasterization_zorder(0)
     plt.title("Miss Distance vs Diameter (Hazardous NEOs)")
     plt.xlabel("Miss Distance (km)")
     plt.ylabel("Diameter Max (km)")
@@ -61,8 +92,7 @@ def main():
     plt.close()
 
     plt.figure(figsize=(10, 6))
-    hazardous_neos['year'] = hazardous_neos['close_approach_date'].dt.year
-    yearly_counts = hazardous_neos.groupby('year').size()
+    yearly_counts = hazardous_neos.groupby(hazardous_neos['close_approach_date'].dt.year).size()
     yearly_counts.plot(kind='bar', color='orange')
     plt.title("Yearly Count of Hazardous NEO Approaches")
     plt.xlabel("Year")
@@ -1,11 +1,16 @@
+import argparse
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 
 import matplotlib
 matplotlib.use('Agg')  # Set non-interactive backend before importing pyplot
+import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+from matplotlib.collections import LineCollection
+from matplotlib.colors import LogNorm
 
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
@@ -13,59 +18,229 @@ SRC_DIR = REPO_ROOT / "src"
 if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
-from asteroid_analysis import ingest
-from asteroid_analysis.features import enrich
+from asteroid_analysis import ingest  # noqa: E402
+from asteroid_analysis.features import SIZE_LABELS_M, add_row_features  # noqa: E402
+from asteroid_analysis.loaders import parquet_sibling  # noqa: E402
 
+# Above this many approaches the trajectory overview is drawn as a binned
+# density raster; individual tracks are unreadable at that point anyway.
+TRAJECTORY_DENSITY_THRESHOLD = 50_000
+TRAJECTORY_RASTER_SHAPE = (1200, 600)
 
-def main():
-    print("Initializing asteroid data collection...")
-    start_date = datetime.now().date()
-    end_date = start_date + timedelta(days=365 * 15)
-    csv_filename = "asteroid_data_full.csv"
+# Fixed log-spaced edges (km) so size histograms can be summed across chunks;
+# diameters outside them are clipped into the end bins rather than dropped.
+SIZE_HIST_EDGES_KM = np.logspace(-4, 2, 51)
+# Points kept for the scatter/boxplot when streaming in chunks.
+CHUNKED_SAMPLE_SIZE = 10_000
+DASHBOARD_COLUMNS = [
+    'id',
+    'close_approach_date',
+    'diameter_km_max',
+    'diameter_m_min',
+    'diameter_m_max',
+    'miss_distance_km',
+    'miss_distance_lunar',
+    'velocity_km_h',
+    'velocity_km_s',
+    'is_potentially_hazardous_asteroid',
+]
 
-    df_full = ingest.ingest(
-        start_date=start_date,
-        end_date=end_date,
-        orbiting_body="Earth",
-        out_path=Path(csv_filename),
-        refresh=False,
-    )
 
-    if df_full.empty:
-        print("No data available for plotting.")
-        return
+class DashboardAccumulator:
+    """Online summaries behind the dashboard figures.
+
+    update() can be fed the whole frame at once or successive CSV chunks; only
+    counts, the per-object closest approaches, and (optionally) bounded random
+    samples are retained between calls.
+    """
+
+    def __init__(self, sample_size=None, seed=42):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.seen_ids = set()
+        self.size_hist = np.zeros(len(SIZE_HIST_EDGES_KM) - 1, dtype=np.int64)
+        self.objects = 0
+        self.hazardous_objects = 0
+        self.approaches = 0
+        self.hazardous_approaches = 0
+        # One slot per size bin plus a last one for rows without a size bin.
+        self.bin_totals = np.zeros(len(SIZE_LABELS_M) + 1, dtype=np.int64)
+        self.bin_hazardous = np.zeros(len(SIZE_LABELS_M) + 1, dtype=np.int64)
+        self.monthly = pd.Series(dtype='int64')
+        self.velocities = None
+        self.closest = None
+
+    def _sample(self, current, new):
+        # Keep the rows with the smallest random keys: a uniform sample
+        # without replacement that can be maintained across chunks.
+        new = new.assign(_key=self.rng.random(len(new)))
+        combined = new if current is None else pd.concat([current, new], ignore_index=True)
+        if self.sample_size is not None and len(combined) > self.sample_size:
+            combined = combined.nsmallest(self.sample_size, '_key')
+        return combined
 
+    def update(self, chunk):
+        hazardous = chunk['is_potentially_hazardous_asteroid'].fillna(False).astype(bool)
+        chunk = chunk.assign(is_potentially_hazardous_asteroid=hazardous)
+
+        self.approaches += len(chunk)
+        self.hazardous_approaches += int(hazardous.sum())
+
+        new_objects = chunk.drop_duplicates('id')
+        new_objects = new_objects[~new_objects['id'].isin(self.seen_ids)]
+        self.seen_ids.update(new_objects['id'])
+        self.objects += len(new_objects)
+        self.hazardous_objects += int(new_objects['is_potentially_hazardous_asteroid'].sum())
+        diameters = new_objects['diameter_km_max'].dropna().to_numpy(dtype=float)
+        counts, _ = np.histogram(
+            np.clip(diameters, SIZE_HIST_EDGES_KM[0], SIZE_HIST_EDGES_KM[-1]),
+            bins=SIZE_HIST_EDGES_KM,
+        )
+        self.size_hist += counts
+
+        # Same size bins as the processed tables: enrich's row features on the
+        # mid diameter, which the raw ingest frame does not carry.
+        diameter_mid_m = (chunk['diameter_m_min'] + chunk['diameter_m_max']) / 2
+        features = add_row_features(chunk.assign(diameter_mid_m=diameter_mid_m))
+        has_id = chunk['id'].notna().to_numpy()
+        codes = features['size_bin_m'].cat.codes.to_numpy()[has_id]
+        slots = np.where(codes < 0, len(SIZE_LABELS_M), codes)
+        minlength = len(SIZE_LABELS_M) + 1
+        self.bin_totals += np.bincount(slots, minlength=minlength)
+        self.bin_hazardous += np.bincount(
+            slots[hazardous.to_numpy()[has_id]], minlength=minlength
+        )
+
+        months = chunk['close_approach_date'].dt.to_period('M').value_counts()
+        self.monthly = self.monthly.add(months, fill_value=0)
+
+        velocities = chunk.loc[
+            chunk['velocity_km_h'].notna(),
+            ['velocity_km_h', 'is_potentially_hazardous_asteroid'],
+        ]
+        self.velocities = self._sample(self.velocities, velocities)
+
+        closest = chunk[
+            ['id', 'diameter_km_max', 'miss_distance_km', 'is_potentially_hazardous_asteroid']
+        ]
+        if self.closest is not None:
+            closest = pd.concat([self.closest, closest], ignore_index=True)
+        self.closest = closest.sort_values('miss_distance_km').drop_duplicates('id')
+
+    def result(self):
+        # Observed bins only, in bin order, with missing sizes last as 'nan'.
+        size_counts = pd.DataFrame(
+            {
+                'size_bin_m': SIZE_LABELS_M + ['nan'],
+                'total': self.bin_totals,
+                'hazardous': self.bin_hazardous,
+            }
+        )
+        size_counts = size_counts[size_counts['total'] > 0].reset_index(drop=True)
+        size_counts['hazard_rate'] = size_counts['hazardous'] / size_counts['total']
+
+        monthly = self.monthly.sort_index()
+        if not monthly.empty:
+            months = pd.period_range(monthly.index.min(), monthly.index.max(), freq='M')
+            monthly = monthly.reindex(months, fill_value=0)
+
+        closest = self.closest
+        if self.sample_size is not None and len(closest) > self.sample_size:
+            closest = closest.sample(n=self.sample_size, random_state=42)
+
+        velocity = self.velocities['velocity_km_h'].to_numpy(dtype=float)
+        hazardous = self.velocities['is_potentially_hazardous_asteroid'].to_numpy(dtype=bool)
+        return {
+            'size_hist': self.size_hist,
+            'hazard_rate_objects': (
+                self.hazardous_objects / self.objects if self.objects else 0
+            ),
+            'hazard_rate_approaches': (
+                self.hazardous_approaches / self.approaches if self.approaches else 0
+            ),
+            'size_counts': size_counts,
+            'velocity_safe': velocity[~hazardous],
+            'velocity_hazardous': velocity[hazardous],
+            'monthly_counts': monthly,
+            'closest_per_object': closest,
+        }
+
+
+def plot_trajectories(df_full):
     print("\nProcessing visualization dataframe...")
-    df_plot = df_full[['name', 'close_approach_date', 'miss_distance_km']].copy()
-    df_plot['close_approach_date'] = pd.to_datetime(df_plot['close_approach_date'])
+    df_plot = df_full[['name', 'close_approach_date', 'miss_distance_km']]
 
     print("Generating plot...")
-    plt.figure(figsize=(12, 6))
-    for name, group in df_plot.groupby('name'):
-        plt.plot(group['close_approach_date'], group['miss_distance_km'], label=name, alpha=0.6)
-
-    plt.title("Asteroid Close Approach Distances Over the Next 15 Years")
-    plt.xlabel("Date")
-    plt.ylabel("Miss Distance from Earth (km)")
-    plt.legend(loc='upper left', bbox_to_anchor=(1, 1), title="Asteroid Name")
+    df_plot = df_plot.dropna(subset=['name', 'close_approach_date', 'miss_distance_km'])
+    df_plot = df_plot.sort_values(['name', 'close_approach_date'])
+    x = mdates.date2num(df_plot['close_approach_date'].to_numpy())
+    y = df_plot['miss_distance_km'].to_numpy(dtype=float)
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    if len(df_plot) > TRAJECTORY_DENSITY_THRESHOLD:
+        # Bin into a fixed pixel grid so drawing cost scales with pixels, not rows.
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=TRAJECTORY_RASTER_SHAPE)
+        ax.imshow(
+            np.ma.masked_equal(counts.T, 0),
+            extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+            origin='lower',
+            aspect='auto',
+            cmap='Blues',
+            norm=LogNorm(),
+            interpolation='nearest',
+        )
+    else:
+        # One LineCollection for every asteroid track instead of a Line2D (and
+        # legend entry) per name, which does not scale to thousands of objects.
+        _, starts = np.unique(df_plot['name'].to_numpy(), return_index=True)
+        bounds = np.append(starts, len(df_plot))
+        segments = [
+            np.column_stack([x[start:end], y[start:end]])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        tracks = LineCollection(
+            segments,
+            colors=plt.rcParams['axes.prop_cycle'].by_key()['color'],
+            alpha=0.6,
+            linewidths=0.5,
+            rasterized=True,
+        )
+        ax.add_collection(tracks)
+        ax.autoscale_view()
+    ax.xaxis_date()
+
+    ax.set_title("Asteroid Close Approach Distances Over the Next 15 Years")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Miss Distance from Earth (km)")
     plt.tight_layout()
 
     output_file = "asteroid_trajectories.png"
     plt.savefig(output_file)
     print(f"\nPlot saved as: {output_file}")
 
+
+def plot_dashboard(summary):
     print("\nGenerating additional visualizations...")
 
+    # Object-level view: one point per asteroid, at its closest approach.
+    closest_per_object = summary['closest_per_object']
     plt.figure(figsize=(12, 8))
     plt.scatter(
-        df_full['diameter_km_max'],
-        df_full['miss_distance_km'],
-        c=df_full['is_potentially_hazardous_asteroid'].map({True: 'red', False: 'blue'}),
-        alpha=0.6
+        closest_per_object['diameter_km_max'],
+        closest_per_object['miss_distance_km'],
+        c=closest_per_object['is_potentially_hazardous_asteroid'].map(
+            {True: 'red', False: 'blue'}
+        ),
+        alpha=0.6,
+        rasterized=True,
+        zorder=-1,
     )
+    plt.gca().set_rasterization_zorder(0)
     plt.xlabel('Asteroid Maximum Diameter (km)')
     plt.ylabel('Miss Distance (km)')
-    plt.title('Asteroid Size vs. Miss Distance\n(Red = Potentially Hazardous)')
+    plt.title(
+        'Asteroid Size vs. Closest Miss Distance per Object\n(Red = Potentially Hazardous)'
+    )
     plt.yscale('log')
     plt.xscale('log')
     plt.grid(True, which="both", ls="-", alpha=0.2)
@@ -75,49 +250,36 @@ def main():
 
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
 
-    ax1.hist(df_full['diameter_km_max'], bins=50, color='skyblue', edgecolor='black')
+    ax1.hist(
+        SIZE_HIST_EDGES_KM[:-1],
+        bins=SIZE_HIST_EDGES_KM,
+        weights=summary['size_hist'],
+        color='skyblue',
+        edgecolor='black',
+    )
     ax1.set_title('Distribution of Asteroid Sizes')
     ax1.set_xlabel('Maximum Diameter (km)')
-    ax1.set_ylabel('Count')
+    ax1.set_ylabel('Object count')
     ax1.set_xscale('log')
 
-    objects = df_full.drop_duplicates('id')
-    hazard_rate_objects = (
-        objects['is_potentially_hazardous_asteroid'].sum() / len(objects)
-        if len(objects) else 0
-    )
-    hazard_rate_approaches = (
-        df_full['is_potentially_hazardous_asteroid'].sum() / len(df_full)
-        if len(df_full) else 0
-    )
-    print(f"Hazard rate by objects: {hazard_rate_objects:.2%}")
-    print(f"Hazard rate by approaches: {hazard_rate_approaches:.2%}")
-
-    enriched = enrich(df_full)
-    size_counts = (
-        enriched.groupby('size_bin_m', dropna=False)
-        .agg(total=('id', 'size'), hazardous=('is_potentially_hazardous_asteroid', 'sum'))
-        .reset_index()
-    )
-    size_counts['hazard_rate'] = size_counts['hazardous'] / size_counts['total']
-    ax2.bar(size_counts['size_bin_m'].astype(str), size_counts['hazard_rate'], color='slateblue')
+    print(f"Hazard rate by objects: {summary['hazard_rate_objects']:.2%}")
+    print(f"Hazard rate by approaches: {summary['hazard_rate_approaches']:.2%}")
+
+    size_counts = summary['size_counts']
+    ax2.bar(size_counts['size_bin_m'], size_counts['hazard_rate'], color='slateblue')
     ax2.set_title('Hazard Rate by Size Bin')
     ax2.set_xlabel('Size Bin')
     ax2.set_ylabel('Hazard Rate')
     ax2.set_ylim(0, 1)
 
     ax3.boxplot(
-        [
-            df_full[~df_full['is_potentially_hazardous_asteroid']]['velocity_km_h'],
-            df_full[df_full['is_potentially_hazardous_asteroid']]['velocity_km_h']
-        ],
-        labels=['Safe', 'Hazardous']
+        [summary['velocity_safe'], summary['velocity_hazardous']],
+        tick_labels=['Safe', 'Hazardous'],
     )
     ax3.set_title('Velocity Distribution by Hazard Status')
     ax3.set_ylabel('Velocity (km/h)')
 
-    df_full['month'] = pd.to_datetime(df_full['close_approach_date']).dt.strftime('%Y-%m')
-    monthly_counts = df_full['month'].value_counts().sort_index()
+    monthly_counts = summary['monthly_counts']
     ax4.plot(range(len(monthly_counts)), monthly_counts.values, 'g-')
     ax4.set_title('Monthly Frequency of Close Approaches')
     ax4.set_xlabel('Months from Start')
@@ -130,5 +292,70 @@ def main():
     plt.close('all')
 
 
+def main(chunksize=None):
+    print("Initializing asteroid data collection...")
+    start_date = datetime.now().date()
+    end_date = start_date + timedelta(days=365 * 15)
+    csv_filename = "asteroid_data_full.csv"
+
+    df_full = ingest.ingest(
+        start_date=start_date,
+        end_date=end_date,
+        orbiting_body="Earth",
+        out_path=Path(csv_filename),
+        refresh=False,
+        return_frame=chunksize is None,
+    )
+
+    if chunksize is not None:
+        # Memory-constrained path: never hold the full dataset, only the
+        # running summaries and bounded samples the dashboard needs.
+        accumulator = DashboardAccumulator(sample_size=CHUNKED_SAMPLE_SIZE)
+        chunks = pd.read_csv(
+            csv_filename,
+            usecols=DASHBOARD_COLUMNS,
+            dtype={'id': 'str'},
+            parse_dates=['close_approach_date'],
+            date_format='%Y-%m-%d',
+            chunksize=chunksize,
+        )
+        for chunk in chunks:
+            accumulator.update(chunk)
+        if not accumulator.approaches:
+            print("No data available for plotting.")
+            return
+        print("Skipping the trajectory overview in chunked mode.")
+        plot_dashboard(accumulator.result())
+        return
+
+    if df_full.empty:
+        print("No data available for plotting.")
+        return
+
+    # Parse once; the parquet copy then stores datetime64 so readers never reparse.
+    df_full['close_approach_date'] = pd.to_datetime(
+        df_full['close_approach_date'], format='%Y-%m-%d', cache=True
+    )
+
+    parquet_path = parquet_sibling(Path(csv_filename))
+    df_full.to_parquet(parquet_path, compression='zstd', index=False)
+    print(f"Columnar copy saved to: {parquet_path}")
+
+    plot_trajectories(df_full)
+
+    accumulator = DashboardAccumulator()
+    accumulator.update(df_full)
+    plot_dashboard(accumulator.result())
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Fetch NeoWs data and plot the 15-year overview."
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        help="Stream the saved CSV in chunks of this many rows to bound memory.",
+    )
+    args = parser.parse_args()
+    main(chunksize=args.chunksize)
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+SRC_DIR = SCRIPTS_DIR.parent / "src"
+for path in (SRC_DIR, SCRIPTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import apophis  # noqa: E402
+import close_approaches  # noqa: E402
+import dangerous_asteroids  # noqa: E402
+
+from asteroid_analysis.loaders import load_clean  # noqa: E402
+
+
+def main():
+    # Parse and type the dataset once, then hand the same frame to each script.
+    df = load_clean(Path("asteroid_data_full.csv"))
+    for script in (dangerous_asteroids, apophis, close_approaches):
+        script.main(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,53 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
 import json
 
+import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
 from asteroid_analysis.reports import build_reports
-from asteroid_analysis.features import enrich
+from asteroid_analysis.features import (
+    ROW_FEATURE_COLUMNS,
+    add_row_features,
+    cap_scatter_points,
+)
 from asteroid_analysis.metadata import build_metadata, write_metadata
 
 DATA_DIR = Path("data/processed")
 
+APOPHIS_IDS = [2099942, 99942]
+# Above this many points the size scatter is downsampled before plotting.
+SCATTER_POINT_LIMIT = 20_000
+SCATTER_HOVER_COLUMNS = [
+    "name",
+    "id",
+    "close_approach_date",
+    "miss_distance_lunar",
+    "velocity_km_s",
+    "absolute_magnitude_h",
+    "nasa_jpl_url",
+]
+SCATTER_HOVER_TEMPLATE = (
+    "<b>%{customdata[0]}</b><br>"
+    "id=%{customdata[1]}<br>"
+    "close_approach_date=%{customdata[2]|%Y-%m-%d}<br>"
+    "miss_distance_km=%{x}<br>"
+    "miss_distance_lunar=%{customdata[3]}<br>"
+    "diameter_mid_km=%{y}<br>"
+    "velocity_km_s=%{customdata[4]}<br>"
+    "absolute_magnitude_h=%{customdata[5]}<br>"
+    "nasa_jpl_url=%{customdata[6]}"
+)
+
 REQUIRED_OBJECT_COLUMNS = [
     "id",
     "name",
@@ -46,6 +79,31 @@ REQUIRED_APPROACH_COLUMNS = [
 ]
 
 
+# Columns read by the filtered views: the dashboard tabs, add_row_features(),
+# and the run metadata. Everything else in the processed tables stays on disk.
+APP_COLUMNS = [
+    "id",
+    "name",
+    "nasa_jpl_url",
+    "absolute_magnitude_h",
+    "is_potentially_hazardous_asteroid",
+    "is_sentry_object",
+    "diameter_km_min",
+    "diameter_km_max",
+    "diameter_mid_km",
+    "diameter_mid_m",
+    "close_approach_date",
+    "velocity_km_s",
+    "miss_distance_lunar",
+    "miss_distance_km",
+    "orbiting_body",
+    "orbit_class_name",
+    "minimum_orbit_intersection",
+]
+
+ORBIT_APP_COLUMNS = ["id", "orbit_class_name", "minimum_orbit_intersection"]
+
+
 def get_missing_processed_paths(data_dir: Path):
     objects_path = data_dir / "objects.parquet"
     approaches_path = data_dir / "approaches.parquet"
@@ -58,27 +116,157 @@ def get_data_mtimes(data_dir: Path):
     approaches_path = data_dir / "approaches.parquet"
     orbits_path = data_dir / "orbits.parquet"
     aggregates_path = data_dir / "aggregates.parquet"
+    merged_path = data_dir / "merged.parquet"
     return (
         objects_path.stat().st_mtime if objects_path.exists() else 0,
         approaches_path.stat().st_mtime if approaches_path.exists() else 0,
         orbits_path.stat().st_mtime if orbits_path.exists() else 0,
         aggregates_path.stat().st_mtime if aggregates_path.exists() else 0,
+        merged_path.stat().st_mtime if merged_path.exists() else 0,
+    )
+
+
+@dataclass(frozen=True)
+class AppFilters:
+    orbiting_body: str | None = None
+    date_range: tuple[date, date] | None = None
+    hazard: str = "All"
+    sentry_only: bool = False
+    miss_range: tuple[float, float] | None = None
+    vel_range: tuple[float, float] | None = None
+    diam_range: tuple[float, float] | None = None
+    orbit_class: str | None = None
+    moid_range: tuple[float, float] | None = None
+
+
+def _between(column: str, bounds: tuple[float, float]):
+    return (ds.field(column) >= bounds[0]) & (ds.field(column) <= bounds[1])
+
+
+def filter_predicates(filters: AppFilters):
+    # (column, expression) pairs; each one is pushed down to the first table
+    # that has the column so Arrow skips non-matching rows while scanning.
+    predicates = []
+    if filters.date_range is not None:
+        start_date, end_date = filters.date_range
+        start_ts = pd.Timestamp(start_date)
+        end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        predicates.append(
+            (
+                "close_approach_date",
+                (ds.field("close_approach_date") >= start_ts)
+                & (ds.field("close_approach_date") < end_ts),
+            )
+        )
+    if filters.orbiting_body is not None:
+        predicates.append(
+            ("orbiting_body", ds.field("orbiting_body") == filters.orbiting_body)
+        )
+    if filters.hazard == "Hazardous only":
+        predicates.append(
+            (
+                "is_potentially_hazardous_asteroid",
+                ds.field("is_potentially_hazardous_asteroid") == True,  # noqa: E712
+            )
+        )
+    elif filters.hazard == "Non-hazardous only":
+        predicates.append(
+            (
+                "is_potentially_hazardous_asteroid",
+                ds.field("is_potentially_hazardous_asteroid") == False,  # noqa: E712
+            )
+        )
+    if filters.sentry_only:
+        predicates.append(
+            ("is_sentry_object", ds.field("is_sentry_object") == True)  # noqa: E712
+        )
+    for column, bounds in [
+        ("miss_distance_km", filters.miss_range),
+        ("velocity_km_s", filters.vel_range),
+        ("diameter_mid_km", filters.diam_range),
+        ("minimum_orbit_intersection", filters.moid_range),
+    ]:
+        if bounds is not None:
+            predicates.append((column, _between(column, bounds)))
+    if filters.orbit_class not in (None, "All"):
+        predicates.append(
+            ("orbit_class_name", ds.field("orbit_class_name") == filters.orbit_class)
+        )
+    return predicates
+
+
+def _to_pandas(table) -> pd.DataFrame:
+    # One block per column and Arrow buffers released as they are converted,
+    # so peak memory stays close to a single copy of the table.
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _read_parquet(path: Path, columns=None) -> pd.DataFrame:
+    table = pq.read_table(
+        path,
+        columns=columns,
+        memory_map=True,
+        use_threads=True,
+        pre_buffer=True,
     )
+    return _to_pandas(table)
+
+
+def _scan(path: Path, predicates, columns=None):
+    # Returns the frame plus the predicate columns that were applied, so
+    # later tables in the join skip conditions already enforced.
+    parquet_format = ds.ParquetFileFormat(
+        default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+    )
+    dataset = ds.dataset(
+        str(path),
+        format=parquet_format,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
+    names = set(dataset.schema.names)
+    expression = None
+    applied = set()
+    for column, predicate in predicates:
+        if column not in names:
+            continue
+        applied.add(column)
+        expression = predicate if expression is None else expression & predicate
+    table = dataset.to_table(columns=columns, filter=expression, use_threads=True)
+    remaining = [
+        (column, predicate) for column, predicate in predicates if column not in applied
+    ]
+    return _to_pandas(table), bool(applied), remaining
 
 
-def load_dataframes(data_dir: Path):
+def load_dataframes(data_dir: Path, filters: AppFilters | None = None):
     objects_path = data_dir / "objects.parquet"
     approaches_path = data_dir / "approaches.parquet"
     orbits_path = data_dir / "orbits.parquet"
     aggregates_path = data_dir / "aggregates.parquet"
 
-    objects = pd.read_parquet(objects_path)
-    approaches = pd.read_parquet(approaches_path)
-    object_cols = [col for col in REQUIRED_OBJECT_COLUMNS if col not in approaches.columns]
+    predicates = filter_predicates(filters) if filters is not None else []
+    approach_cols = None
+    if filters is not None:
+        approach_names = pq.read_schema(approaches_path).names
+        approach_cols = [col for col in APP_COLUMNS if col in approach_names]
+    approaches, _, predicates = _scan(
+        approaches_path, predicates, columns=approach_cols
+    )
+    object_cols = [
+        col
+        for col in REQUIRED_OBJECT_COLUMNS
+        if col not in approaches.columns and (filters is None or col in APP_COLUMNS)
+    ]
+    # Only the columns the merge adds are read once filters are in play.
+    objects, objects_filtered, predicates = _scan(
+        objects_path,
+        predicates,
+        columns=None if filters is None else ["id"] + object_cols,
+    )
     merged = approaches.merge(
         objects[["id"] + object_cols],
         on="id",
-        how="left",
+        how="inner" if objects_filtered else "left",
     )
     for col in ["is_potentially_hazardous_asteroid", "is_sentry_object"]:
         if col not in merged.columns and col in objects.columns:
@@ -86,19 +274,159 @@ def load_dataframes(data_dir: Path):
 
     orbits = None
     if orbits_path.exists():
-        orbits = pd.read_parquet(orbits_path)
-        merged = merged.merge(orbits, on="id", how="left")
+        orbits, orbits_filtered, predicates = _scan(
+            orbits_path,
+            predicates,
+            columns=None if filters is None else ORBIT_APP_COLUMNS,
+        )
+        # Orbit ids come back from the lookup API as strings; cast them to the
+        # approaches' integer ids rather than stringifying every approach id.
+        orbits = orbits.astype({"id": merged["id"].dtype})
+        merged = merged.merge(
+            orbits, on="id", how="inner" if orbits_filtered else "left"
+        )
 
     aggregates = None
     if aggregates_path.exists():
-        aggregates = pd.read_parquet(aggregates_path)
+        aggregates = _read_parquet(aggregates_path)
 
     return objects, approaches, merged, orbits, aggregates
 
 
+def _compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    # One byte per flag and integer codes for the low-cardinality strings,
+    # whichever path produced the frame (left joins leave object flags).
+    for col in ["is_potentially_hazardous_asteroid", "is_sentry_object"]:
+        if col in df.columns and df[col].dtype != bool:
+            df[col] = df[col].astype("boolean").fillna(False).astype(bool)
+    for col in ["orbiting_body", "orbit_class_name"]:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def load_merged(data_dir: Path, filters: AppFilters):
+    # Read the pre-joined table written by build when it is at least as new
+    # as its inputs; otherwise join the individual tables here.
+    merged_path = data_dir / "merged.parquet"
+    sources = [
+        data_dir / "objects.parquet",
+        data_dir / "approaches.parquet",
+        data_dir / "orbits.parquet",
+    ]
+    newest_source = max(path.stat().st_mtime for path in sources if path.exists())
+    if merged_path.exists() and merged_path.stat().st_mtime >= newest_source:
+        names = pq.read_schema(merged_path).names
+        merged, _, _ = _scan(
+            merged_path,
+            filter_predicates(filters),
+            columns=[
+                col for col in APP_COLUMNS + ROW_FEATURE_COLUMNS if col in names
+            ],
+        )
+        return _compact_dtypes(merged)
+    return _compact_dtypes(load_dataframes(data_dir, filters)[2])
+
+
+def _stats_range(path: Path, column: str):
+    # Fold the row-group min/max stored in the parquet footer; the column is
+    # only read when some row group with values lacks statistics.
+    metadata = pq.ParquetFile(path).metadata
+    index = metadata.schema.names.index(column)
+    lows, highs = [], []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        stats = row_group.column(index).statistics
+        if stats is not None and stats.has_min_max:
+            lows.append(stats.min)
+            highs.append(stats.max)
+        elif stats is None or stats.null_count != row_group.num_rows:
+            values = _read_parquet(path, columns=[column])[column].dropna()
+            return (values.min(), values.max()) if not values.empty else None
+    if not lows:
+        return None
+    return min(lows), max(highs)
+
+
+def _float_range(bounds):
+    return None if bounds is None else (float(bounds[0]), float(bounds[1]))
+
+
+def summarize_dataframes(data_dir: Path):
+    # Everything the sidebar and the unfiltered metrics need, read from the
+    # handful of columns involved rather than from the full merged table.
+    objects_path = data_dir / "objects.parquet"
+    approaches_path = data_dir / "approaches.parquet"
+    orbits_path = data_dir / "orbits.parquet"
+    aggregates_path = data_dir / "aggregates.parquet"
+    flag_cols = ["is_potentially_hazardous_asteroid", "is_sentry_object"]
+
+    approach_names = pq.read_schema(approaches_path).names
+    approach_cols = ["id", "orbiting_body"] + [
+        col for col in flag_cols if col in approach_names
+    ]
+    approaches = _read_parquet(approaches_path, columns=approach_cols)
+    objects = _read_parquet(objects_path, columns=["id"] + flag_cols)
+
+    approach_flags = approaches
+    missing_flags = [col for col in flag_cols if col not in approaches.columns]
+    if missing_flags:
+        approach_flags = approaches[["id"]].merge(
+            objects[["id"] + missing_flags], on="id", how="left"
+        )
+
+    orbit_classes = None
+    moid_range = None
+    if orbits_path.exists():
+        orbits = _read_parquet(orbits_path, columns=["orbit_class_name"])
+        orbit_classes = sorted(orbits["orbit_class_name"].dropna().unique().tolist())
+        moid_range = _float_range(
+            _stats_range(orbits_path, "minimum_orbit_intersection")
+        )
+
+    aggregates = None
+    if aggregates_path.exists():
+        aggregates = _read_parquet(aggregates_path)
+
+    date_bounds = _stats_range(approaches_path, "close_approach_date")
+    object_sums = objects[flag_cols].sum()
+    approach_sums = approach_flags[flag_cols].sum()
+    return {
+        "pre_counts": {
+            "total_approaches": len(approaches),
+            "unique_objects": approaches["id"].nunique(),
+            "hazardous_objects": object_sums["is_potentially_hazardous_asteroid"],
+            "hazardous_approaches": approach_sums["is_potentially_hazardous_asteroid"],
+            "sentry_objects": object_sums["is_sentry_object"],
+            "sentry_approaches": approach_sums["is_sentry_object"],
+        },
+        "min_date": pd.Timestamp(date_bounds[0]) if date_bounds else pd.NaT,
+        "max_date": pd.Timestamp(date_bounds[1]) if date_bounds else pd.NaT,
+        "miss_range": _float_range(_stats_range(approaches_path, "miss_distance_km")),
+        "vel_range": _float_range(_stats_range(approaches_path, "velocity_km_s")),
+        "diam_range": _float_range(_stats_range(objects_path, "diameter_mid_km")),
+        "orbiting_options": sorted(
+            approaches["orbiting_body"].dropna().unique().tolist()
+        ),
+        "orbit_classes": orbit_classes,
+        "moid_range": moid_range,
+        "aggregates": aggregates,
+    }
+
+
 @st.cache_data(show_spinner="Loading data...")
 def load_data(data_dir: Path, mtimes):
-    return load_dataframes(data_dir)
+    return summarize_dataframes(data_dir)
+
+
+@st.cache_data(show_spinner="Filtering data...", max_entries=8)
+def load_filtered(data_dir: Path, mtimes, filters: AppFilters):
+    # merged.parquet carries the per-row features; only the fallback join
+    # (or a table written before they were added) computes them here.
+    df = load_merged(data_dir, filters)
+    if not set(ROW_FEATURE_COLUMNS).issubset(df.columns):
+        df = add_row_features(df)
+    return df
 
 
 @st.cache_data(show_spinner=False)
@@ -114,10 +442,12 @@ def sample_plot_data(df: pd.DataFrame, mode: str, sample_n: int) -> pd.DataFrame
     if mode == "Stratified by hazard + size_bin_m":
         if "size_bin_m" not in df.columns:
             return df
+        # Empty hazard/size combinations would only shrink per_group.
         groups = df.groupby(
             ["is_potentially_hazardous_asteroid", "size_bin_m"],
             dropna=False,
-            observed=False,
+            observed=True,
+            sort=False,
         )
         parts = []
         per_group = max(1, sample_n // max(1, groups.ngroups))
@@ -130,8 +460,36 @@ def sample_plot_data(df: pd.DataFrame, mode: str, sample_n: int) -> pd.DataFrame
     return df
 
 
+def monthly_counts(df: pd.DataFrame) -> pd.DataFrame:
+    # One hashing pass over month periods; empty months inside the span are
+    # filled so the line and heatmap still show gaps as zeros.
+    counts = df["close_approach_date"].dt.to_period("M").value_counts()
+    if not counts.empty:
+        months = pd.period_range(counts.index.min(), counts.index.max(), freq="M")
+        counts = counts.reindex(months, fill_value=0)
+    monthly = counts.rename_axis("close_approach_date").reset_index(name="count")
+    monthly["close_approach_date"] = monthly["close_approach_date"].dt.to_timestamp()
+    return monthly
+
+
+def monthly_grid(df: pd.DataFrame):
+    # Count approaches straight into the (year x month) grid: months since
+    # 1970 give year and month indexes, and bincount fills the cells.
+    dates = df["close_approach_date"].dropna().to_numpy()
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    first, last = months.min(), months.max()
+    first_year = first // 12
+    n_years = last // 12 - first_year + 1
+    grid = np.bincount(months - first_year * 12, minlength=n_years * 12)
+    grid = grid.reshape(n_years, 12)
+    # Only calendar months that occur inside the observed span get a column.
+    columns = np.unique(np.arange(first, last + 1) % 12)
+    years = np.arange(first_year, first_year + n_years) + 1970
+    return grid[:, columns], columns + 1, years
+
+
 def build_monthly_heatmap(df: pd.DataFrame) -> go.Figure:
-    if df.empty:
+    if df["close_approach_date"].isna().all():
         fig = go.Figure()
         fig.update_layout(
             title="Monthly Approach Volume",
@@ -140,28 +498,13 @@ def build_monthly_heatmap(df: pd.DataFrame) -> go.Figure:
         )
         return fig
 
-    monthly = (
-        df.set_index("close_approach_date")
-        .sort_index()
-        .resample("M")
-        .size()
-        .rename("count")
-        .reset_index()
-    )
-    monthly["year"] = monthly["close_approach_date"].dt.year
-    monthly["month"] = monthly["close_approach_date"].dt.month
-
-    heatmap_data = (
-        monthly.pivot(index="year", columns="month", values="count")
-        .fillna(0)
-        .sort_index()
-    )
+    grid, month_numbers, years = monthly_grid(df)
 
     fig = go.Figure(
         data=go.Heatmap(
-            z=heatmap_data.values,
-            x=[date(2000, m, 1).strftime("%b") for m in heatmap_data.columns],
-            y=heatmap_data.index.astype(str),
+            z=grid,
+            x=[date(2000, m, 1).strftime("%b") for m in month_numbers],
+            y=years.astype(str),
             colorscale="Blues",
             colorbar_title="Approaches",
         )
@@ -176,6 +519,152 @@ def build_monthly_heatmap(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
+def top_k(df: pd.DataFrame, column: str, k: int, largest: bool = False) -> pd.DataFrame:
+    # Same rows and order as nsmallest/nlargest (ties by position, NaNs
+    # last), but selected with an O(N) partition; only k rows are sorted.
+    if k <= 0:
+        return df.iloc[:0]
+    values = df[column].to_numpy(dtype=float)
+    valid = np.flatnonzero(~np.isnan(values))
+    keys = -values[valid] if largest else values[valid]
+    if k < len(keys):
+        # Partition to find the k-th value, then keep the earliest ties.
+        kth_value = np.partition(keys, k - 1)[k - 1]
+        below = np.flatnonzero(keys < kth_value)
+        ties = np.flatnonzero(keys == kth_value)[: k - len(below)]
+        selected = np.concatenate([below, ties])
+    else:
+        selected = np.arange(len(keys))
+    order = valid[selected[np.lexsort((selected, keys[selected]))]]
+    if k > len(order):
+        # Like pandas, pad with NaN rows once the valid values run out.
+        missing = np.flatnonzero(np.isnan(values))[: k - len(order)]
+        order = np.concatenate([order, missing])
+    return df.iloc[order]
+
+
+def apophis_mask(df: pd.DataFrame) -> np.ndarray:
+    names = df["name"]
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        # Match against the handful of distinct names, then compare codes.
+        matches = names.cat.categories.str.contains("Apophis", case=False, regex=False)
+        name_mask = np.isin(names.cat.codes.to_numpy(), np.flatnonzero(matches))
+    else:
+        name_mask = names.str.contains(
+            "Apophis", case=False, na=False, regex=False
+        ).to_numpy()
+
+    ids = df["id"]
+    if pd.api.types.is_integer_dtype(ids.dtype):
+        id_mask = np.isin(ids.to_numpy(), APOPHIS_IDS)
+    else:
+        apophis_ids = [str(neo_id) for neo_id in APOPHIS_IDS]
+        id_mask = ids.astype(str).isin(apophis_ids).to_numpy()
+    return name_mask | id_mask
+
+
+def approach_counts(df: pd.DataFrame) -> dict:
+    # Flags are per object, so one groupby gives the unique-object count and
+    # both object-level sums; one frame sum covers the approach-level ones.
+    flag_cols = ["is_potentially_hazardous_asteroid", "is_sentry_object"]
+    per_object = df.groupby("id", sort=False)[flag_cols].any()
+    object_sums = per_object.sum()
+    approach_sums = df[flag_cols].sum()
+    return {
+        "total_approaches": len(df),
+        "unique_objects": len(per_object),
+        "hazardous_objects": object_sums["is_potentially_hazardous_asteroid"],
+        "hazardous_approaches": approach_sums["is_potentially_hazardous_asteroid"],
+        "sentry_objects": object_sums["is_sentry_object"],
+        "sentry_approaches": approach_sums["is_sentry_object"],
+    }
+
+
+def hazard_rate_by_size(df: pd.DataFrame) -> pd.DataFrame:
+    # size_bin_m is categorical (see enrich), so its codes index bincount
+    # directly; the extra last slot collects rows without a size bin.
+    bins = df["size_bin_m"]
+    categories = bins.cat.categories
+    codes = bins.cat.codes.to_numpy()
+    slots = np.where(codes < 0, len(categories), codes)
+    hazardous = df["is_potentially_hazardous_asteroid"].to_numpy(dtype=np.int64)
+    size_counts = pd.DataFrame(
+        {
+            "size_bin_m": pd.Categorical(
+                list(categories) + [np.nan], dtype=bins.dtype
+            ),
+            "total": np.bincount(slots, minlength=len(categories) + 1),
+            "hazardous": np.bincount(
+                slots, weights=hazardous, minlength=len(categories) + 1
+            ).astype(np.int64),
+        }
+    )
+    # Observed bins only, like groupby(observed=True, dropna=False).
+    size_counts = size_counts[size_counts["total"] > 0].reset_index(drop=True)
+    size_counts["hazard_rate"] = size_counts["hazardous"] / size_counts["total"]
+    return size_counts
+
+
+def orbit_class_counts(df: pd.DataFrame) -> pd.DataFrame:
+    return (
+        df.groupby("orbit_class_name", dropna=False, observed=True)
+        .size()
+        .reset_index(name="count")
+    )
+
+
+def rank_approaches(df: pd.DataFrame, ranking_metric: str) -> pd.DataFrame:
+    if ranking_metric == "closest miss_distance_km":
+        ranked = top_k(df, "miss_distance_km", 50)
+    elif ranking_metric == "largest diameter_mid_km":
+        ranked = top_k(df, "diameter_mid_km", 50, largest=True)
+    elif ranking_metric == "fastest velocity_km_s":
+        ranked = top_k(df, "velocity_km_s", 50, largest=True)
+    else:
+        ranked = top_k(df, "energy_proxy", 50, largest=True)
+    return ranked
+
+
+# Derived views keyed on the filter state rather than on the frame itself, so
+# widget changes that leave the filters alone skip the recomputation.
+@st.cache_data(show_spinner=False)
+def cached_approach_counts(data_dir: Path, mtimes, filters: AppFilters) -> dict:
+    return approach_counts(load_filtered(data_dir, mtimes, filters))
+
+
+@st.cache_data(show_spinner=False)
+def cached_monthly_counts(data_dir: Path, mtimes, filters: AppFilters) -> pd.DataFrame:
+    return monthly_counts(load_filtered(data_dir, mtimes, filters))
+
+
+@st.cache_data(show_spinner=False)
+def cached_monthly_heatmap(data_dir: Path, mtimes, filters: AppFilters) -> go.Figure:
+    return build_monthly_heatmap(load_filtered(data_dir, mtimes, filters))
+
+
+@st.cache_data(show_spinner=False)
+def cached_hazard_rate_by_size(data_dir: Path, mtimes, filters: AppFilters):
+    return hazard_rate_by_size(load_filtered(data_dir, mtimes, filters))
+
+
+@st.cache_data(show_spinner=False)
+def cached_orbit_class_counts(data_dir: Path, mtimes, filters: AppFilters):
+    return orbit_class_counts(load_filtered(data_dir, mtimes, filters))
+
+
+@st.cache_data(show_spinner=False)
+def cached_rank_approaches(
+    data_dir: Path, mtimes, filters: AppFilters, ranking_metric: str
+):
+    return rank_approaches(load_filtered(data_dir, mtimes, filters), ranking_metric)
+
+
+@st.cache_data(show_spinner=False)
+def cached_apophis_approaches(data_dir: Path, mtimes, filters: AppFilters):
+    filtered = load_filtered(data_dir, mtimes, filters)
+    return filtered[apophis_mask(filtered)].sort_values("close_approach_date")
+
+
 def main():
     st.set_page_config(page_title="Asteroid Approaches Explorer", layout="wide")
     st.title("Asteroid Close Approaches Explorer")
@@ -185,14 +674,15 @@ def main():
         st.error(
             "Missing processed tables: "
             + ", ".join(str(path) for path in missing)
-            + "\nRun: python -m asteroid_analysis.build --input asteroid_data_full.csv --outdir data/processed"
+            + "\nRun: python -m asteroid_analysis.build --input asteroid_data_full.parquet --outdir data/processed"
         )
         st.stop()
 
     mtimes = get_data_mtimes(DATA_DIR)
-    objects, approaches, merged, orbits, aggregates = load_data(DATA_DIR, mtimes)
+    summary = load_data(DATA_DIR, mtimes)
+    aggregates = summary["aggregates"]
 
-    if merged.empty:
+    if summary["pre_counts"]["total_approaches"] == 0:
         st.warning("Processed tables are empty. Run ingestion/build to populate data.")
         st.stop()
 
@@ -214,8 +704,8 @@ def main():
         except json.JSONDecodeError:
             pass
 
-    min_date = merged["close_approach_date"].min()
-    max_date = merged["close_approach_date"].max()
+    min_date = summary["min_date"]
+    max_date = summary["max_date"]
     if pd.isna(min_date) or pd.isna(max_date):
         st.error("Missing close_approach_date values in processed data.")
         st.stop()
@@ -232,10 +722,8 @@ def main():
     )
     sentry_only = st.sidebar.checkbox("Sentry objects only", value=False)
 
-    miss_values = merged["miss_distance_km"].dropna()
-    miss_disabled = miss_values.empty
-    miss_min = float(miss_values.min()) if not miss_disabled else 0.0
-    miss_max = float(miss_values.max()) if not miss_disabled else 0.0
+    miss_disabled = summary["miss_range"] is None
+    miss_min, miss_max = summary["miss_range"] or (0.0, 0.0)
     miss_range = st.sidebar.slider(
         "Miss distance (km)",
         min_value=miss_min,
@@ -244,10 +732,8 @@ def main():
         disabled=miss_disabled,
     )
 
-    vel_values = merged["velocity_km_s"].dropna()
-    vel_disabled = vel_values.empty
-    vel_min = float(vel_values.min()) if not vel_disabled else 0.0
-    vel_max = float(vel_values.max()) if not vel_disabled else 0.0
+    vel_disabled = summary["vel_range"] is None
+    vel_min, vel_max = summary["vel_range"] or (0.0, 0.0)
     vel_range = st.sidebar.slider(
         "Velocity (km/s)",
         min_value=vel_min,
@@ -256,10 +742,8 @@ def main():
         disabled=vel_disabled,
     )
 
-    diam_values = merged["diameter_mid_km"].dropna()
-    diam_disabled = diam_values.empty
-    diam_min = float(diam_values.min()) if not diam_disabled else 0.0
-    diam_max = float(diam_values.max()) if not diam_disabled else 0.0
+    diam_disabled = summary["diam_range"] is None
+    diam_min, diam_max = summary["diam_range"] or (0.0, 0.0)
     diam_range = st.sidebar.slider(
         "Diameter mid (km)",
         min_value=diam_min,
@@ -268,7 +752,7 @@ def main():
         disabled=diam_disabled,
     )
 
-    orbiting_options = sorted(merged["orbiting_body"].dropna().unique().tolist())
+    orbiting_options = summary["orbiting_options"]
     if not orbiting_options:
         st.error("No orbiting body values available in processed data.")
         st.stop()
@@ -283,15 +767,13 @@ def main():
     moid_range = None
     moid_min = None
     moid_max = None
-    if orbits is not None and "orbit_class_name" in merged.columns:
-        classes = sorted(merged["orbit_class_name"].dropna().unique().tolist())
+    if summary["orbit_classes"] is not None:
         orbit_class_filter = st.sidebar.selectbox(
             "Orbit class",
-            ["All"] + classes,
+            ["All"] + summary["orbit_classes"],
         )
-        if merged["minimum_orbit_intersection"].notna().any():
-            moid_min = float(merged["minimum_orbit_intersection"].min())
-            moid_max = float(merged["minimum_orbit_intersection"].max())
+        if summary["moid_range"] is not None:
+            moid_min, moid_max = summary["moid_range"]
             moid_range = st.sidebar.slider(
                 "Minimum orbit intersection (AU)",
                 min_value=moid_min,
@@ -299,46 +781,22 @@ def main():
                 value=(moid_min, moid_max),
             )
 
-    filtered = merged.copy()
-    if isinstance(date_range, tuple):
-        start_date, end_date = date_range
-        filtered = filtered[
-            (filtered["close_approach_date"].dt.date >= start_date)
-            & (filtered["close_approach_date"].dt.date <= end_date)
-        ]
-
-    if hazard_filter == "Hazardous only":
-        filtered = filtered[filtered["is_potentially_hazardous_asteroid"]]
-    elif hazard_filter == "Non-hazardous only":
-        filtered = filtered[~filtered["is_potentially_hazardous_asteroid"]]
-
-    if sentry_only:
-        filtered = filtered[filtered["is_sentry_object"]]
-
-    filtered = filtered[
-        (filtered["miss_distance_km"] >= miss_range[0])
-        & (filtered["miss_distance_km"] <= miss_range[1])
-    ]
-    filtered = filtered[
-        (filtered["velocity_km_s"] >= vel_range[0])
-        & (filtered["velocity_km_s"] <= vel_range[1])
-    ]
-    filtered = filtered[
-        (filtered["diameter_mid_km"] >= diam_range[0])
-        & (filtered["diameter_mid_km"] <= diam_range[1])
-    ]
-
-    filtered = filtered[filtered["orbiting_body"] == orbiting_body]
-
-    if orbit_class_filter and orbit_class_filter != "All":
-        filtered = filtered[filtered["orbit_class_name"] == orbit_class_filter]
-    if moid_range is not None:
-        filtered = filtered[
-            (filtered["minimum_orbit_intersection"] >= moid_range[0])
-            & (filtered["minimum_orbit_intersection"] <= moid_range[1])
-        ]
-
-    filtered = enrich(filtered)
+    filters = AppFilters(
+        orbiting_body=orbiting_body,
+        date_range=(
+            date_range
+            if isinstance(date_range, tuple) and len(date_range) == 2
+            else None
+        ),
+        hazard=hazard_filter,
+        sentry_only=sentry_only,
+        miss_range=miss_range,
+        vel_range=vel_range,
+        diam_range=diam_range,
+        orbit_class=orbit_class_filter,
+        moid_range=moid_range,
+    )
+    filtered = load_filtered(DATA_DIR, mtimes, filters)
 
     if filtered.empty:
         st.warning("No data matches the current filters.")
@@ -357,24 +815,9 @@ def main():
         step=500,
     )
 
-    pre_counts = {
-        "total_approaches": len(merged),
-        "unique_objects": merged["id"].nunique(),
-        "hazardous_objects": objects["is_potentially_hazardous_asteroid"].sum(),
-        "hazardous_approaches": merged["is_potentially_hazardous_asteroid"].sum(),
-        "sentry_objects": objects["is_sentry_object"].sum(),
-        "sentry_approaches": merged["is_sentry_object"].sum(),
-    }
+    pre_counts = summary["pre_counts"]
 
-    filtered_objects = filtered.drop_duplicates("id")
-    post_counts = {
-        "total_approaches": len(filtered),
-        "unique_objects": filtered["id"].nunique(),
-        "hazardous_objects": filtered_objects["is_potentially_hazardous_asteroid"].sum(),
-        "hazardous_approaches": filtered["is_potentially_hazardous_asteroid"].sum(),
-        "sentry_objects": filtered_objects["is_sentry_object"].sum(),
-        "sentry_approaches": filtered["is_sentry_object"].sum(),
-    }
+    post_counts = cached_approach_counts(DATA_DIR, mtimes, filters)
 
     tab_overview, tab_size, tab_rank, tab_apophis, tab_reports = st.tabs(
         ["Overview", "Size vs Distance", "Rankings", "Apophis", "Reports"]
@@ -416,23 +859,34 @@ def main():
         if use_aggregates:
             monthly = aggregates[aggregates["aggregate_type"] == "monthly_counts"]
             monthly = monthly[monthly["orbiting_body"] == orbiting_body]
-            monthly = (
-                monthly.groupby("month", dropna=False)["count"]
-                .sum()
-                .reset_index()
-                .rename(columns={"month": "close_approach_date"})
+            monthly = monthly.groupby("month")["count"].sum()
+            # Aggregates only hold observed months; fill the gaps with zeros
+            # like monthly_counts does.
+            if not monthly.empty:
+                months = pd.date_range(
+                    monthly.index.min(), monthly.index.max(), freq="MS"
+                )
+                monthly = monthly.reindex(months, fill_value=0)
+            monthly = monthly.rename_axis("close_approach_date").reset_index(
+                name="count"
             )
         else:
-            monthly = (
-                filtered.set_index("close_approach_date")
-                .sort_index()
-                .resample("M")
-                .size()
-                .rename("count")
-                .reset_index()
+            monthly = cached_monthly_counts(DATA_DIR, mtimes, filters)
+        # Small aggregated series go straight into graph objects; px would
+        # copy and validate the frame for a single trace.
+        line_fig = go.Figure(
+            go.Scatter(
+                x=monthly["close_approach_date"].to_numpy(),
+                y=monthly["count"].to_numpy(),
+                mode="lines",
             )
-        line_fig = px.line(monthly, x="close_approach_date", y="count")
-        line_fig.update_layout(height=300, margin=dict(l=40, r=20, t=30, b=40))
+        )
+        line_fig.update_layout(
+            xaxis_title="close_approach_date",
+            yaxis_title="count",
+            height=300,
+            margin=dict(l=40, r=20, t=30, b=40),
+        )
 
         if not monthly.empty:
             last_month = monthly["close_approach_date"].max()
@@ -454,46 +908,47 @@ def main():
         st.plotly_chart(line_fig, width="stretch")
 
         st.subheader("Monthly heatmap")
-        st.plotly_chart(build_monthly_heatmap(filtered), width="stretch")
+        st.plotly_chart(
+            cached_monthly_heatmap(DATA_DIR, mtimes, filters), width="stretch"
+        )
 
         st.subheader("Hazard rate by size bin")
         if use_aggregates:
             size_counts = aggregates[aggregates["aggregate_type"] == "hazard_rate_size"]
             size_counts = size_counts[size_counts["orbiting_body"] == orbiting_body]
         else:
-            size_counts = (
-                filtered.groupby("size_bin_m", dropna=False)
-                .agg(
-                    total=("id", "size"),
-                    hazardous=("is_potentially_hazardous_asteroid", "sum"),
-                )
-                .reset_index()
+            size_counts = cached_hazard_rate_by_size(DATA_DIR, mtimes, filters)
+        bar_fig = go.Figure(
+            go.Bar(
+                x=size_counts["size_bin_m"].to_numpy(),
+                y=size_counts["hazard_rate"].to_numpy(),
+                text=size_counts["total"].to_numpy(),
             )
-            size_counts["hazard_rate"] = size_counts["hazardous"] / size_counts["total"]
-        bar_fig = px.bar(
-            size_counts,
-            x="size_bin_m",
-            y="hazard_rate",
-            text="total",
-            labels={"hazard_rate": "Hazard rate", "size_bin_m": "Size bin"},
         )
-        bar_fig.update_layout(height=350, margin=dict(l=40, r=20, t=30, b=40))
+        bar_fig.update_layout(
+            xaxis_title="Size bin",
+            yaxis_title="Hazard rate",
+            height=350,
+            margin=dict(l=40, r=20, t=30, b=40),
+        )
         st.plotly_chart(bar_fig, width="stretch")
 
-        if orbits is not None and "orbit_class_name" in filtered.columns:
+        has_orbit_classes = summary["orbit_classes"] is not None
+        if has_orbit_classes and "orbit_class_name" in filtered.columns:
             st.subheader("Orbit class mix")
-            orbit_counts = (
-                filtered.groupby("orbit_class_name", dropna=False)
-                .size()
-                .reset_index(name="count")
+            orbit_counts = cached_orbit_class_counts(DATA_DIR, mtimes, filters)
+            orbit_fig = go.Figure(
+                go.Bar(
+                    x=orbit_counts["orbit_class_name"].to_numpy(),
+                    y=orbit_counts["count"].to_numpy(),
+                )
             )
-            orbit_fig = px.bar(
-                orbit_counts,
-                x="orbit_class_name",
-                y="count",
-                labels={"orbit_class_name": "Orbit class"},
+            orbit_fig.update_layout(
+                xaxis_title="Orbit class",
+                yaxis_title="count",
+                height=350,
+                margin=dict(l=40, r=20, t=30, b=40),
             )
-            orbit_fig.update_layout(height=350, margin=dict(l=40, r=20, t=30, b=40))
             st.plotly_chart(orbit_fig, width="stretch")
 
     with tab_size:
@@ -505,11 +960,19 @@ def main():
         )
         top_n = st.number_input("Top N labeled points", min_value=5, max_value=100, value=20)
 
-        base_df = filtered.copy()
-        base_df = base_df[
-            (base_df["miss_distance_km"] > 0) & (base_df["diameter_mid_km"] > 0)
-        ]
+        positive = (filtered["miss_distance_km"].to_numpy() > 0) & (
+            filtered["diameter_mid_km"].to_numpy() > 0
+        )
+        # NeoWs distances and diameters are normally all positive; only slice
+        # (and copy) when the log axes actually need rows dropped.
+        base_df = filtered if positive.all() else filtered[positive]
         plot_df = sample_plot_data(base_df, sampling_mode, int(sample_n))
+        if not show_density and len(plot_df) > SCATTER_POINT_LIMIT:
+            st.caption(
+                f"{len(plot_df):,} points exceed the {SCATTER_POINT_LIMIT:,} point "
+                "limit; plotting a sample that keeps every hazardous approach."
+            )
+            plot_df = cap_scatter_points(plot_df, SCATTER_POINT_LIMIT)
 
         if show_density:
             fig = px.density_heatmap(
@@ -527,26 +990,18 @@ def main():
                 y="diameter_mid_km",
                 color="is_potentially_hazardous_asteroid",
                 symbol="is_sentry_object",
-                hover_data={
-                    "name": True,
-                    "id": True,
-                    "close_approach_date": True,
-                    "miss_distance_km": True,
-                    "miss_distance_lunar": True,
-                    "velocity_km_s": True,
-                    "diameter_km_min": True,
-                    "diameter_km_max": True,
-                    "absolute_magnitude_h": True,
-                    "nasa_jpl_url": True,
-                },
+                render_mode="webgl",
+                custom_data=SCATTER_HOVER_COLUMNS,
             )
+            # x/y are already in every point; only these columns ride along.
+            fig.update_traces(hovertemplate=SCATTER_HOVER_TEMPLATE)
 
         fig.update_xaxes(type="log", title="Miss distance (km)")
         fig.update_yaxes(type="log", title="Diameter mid (km)")
         fig.update_layout(height=500, margin=dict(l=40, r=20, t=30, b=40))
 
-        closest = base_df.nsmallest(top_n, "miss_distance_km")
-        largest = base_df.nlargest(top_n, "diameter_mid_km")
+        closest = top_k(base_df, "miss_distance_km", top_n)
+        largest = top_k(base_df, "diameter_mid_km", top_n, largest=True)
         for label_df, label in [(closest, "Closest"), (largest, "Largest")]:
             fig.add_trace(
                 go.Scatter(
@@ -575,23 +1030,9 @@ def main():
             ],
         )
 
-        ranked = filtered.copy()
+        ranked = cached_rank_approaches(DATA_DIR, mtimes, filters, ranking_metric)
 
-        if ranking_metric == "closest miss_distance_km":
-            ranked = ranked.nsmallest(50, "miss_distance_km")
-        elif ranking_metric == "largest diameter_mid_km":
-            ranked = ranked.nlargest(50, "diameter_mid_km")
-        elif ranking_metric == "fastest velocity_km_s":
-            ranked = ranked.nlargest(50, "velocity_km_s")
-        else:
-            ranked = ranked.nlargest(50, "energy_proxy")
-
-        ranked = ranked.copy()
-        ranked["nasa_jpl_url"] = ranked["nasa_jpl_url"].apply(
-            lambda url: f"[link]({url})" if pd.notna(url) else ""
-        )
-
-        table_md = (
+        st.dataframe(
             ranked[
                 [
                     "name",
@@ -603,23 +1044,23 @@ def main():
                     "energy_proxy",
                     "nasa_jpl_url",
                 ]
-            ]
-            .rename(columns={"nasa_jpl_url": "nasa_jpl_url (link)"})
-            .to_markdown(index=False)
+            ],
+            width="stretch",
+            hide_index=True,
+            column_config={
+                "nasa_jpl_url": st.column_config.LinkColumn(
+                    "nasa_jpl_url (link)", display_text="link"
+                )
+            },
         )
-        st.markdown(table_md)
         st.caption("Energy proxy = diameter_mid_m^3 * (velocity_km_s * 1000)^2")
 
     with tab_apophis:
         st.subheader("Apophis close approaches")
-        apophis = filtered[
-            filtered["name"].str.contains("Apophis", case=False, na=False)
-            | filtered["id"].astype(str).isin({"2099942", "99942"})
-        ]
+        apophis = cached_apophis_approaches(DATA_DIR, mtimes, filters)
         if apophis.empty:
             st.info("No Apophis records in the current filter selection.")
         else:
-            apophis = apophis.sort_values("close_approach_date")
             fig = px.line(
                 apophis,
                 x="close_approach_date",
@@ -650,15 +1091,19 @@ def main():
             build_reports(Path(report_outdir), report_body, DATA_DIR)
             st.success(f"Reports written to {report_outdir}")
 
-    metadata = build_metadata(
-        df=filtered,
-        input_path=Path("data/processed/approaches.parquet"),
-        orbiting_body_filter=orbiting_body,
-        input_csv_hash="",
-        raw_cache_dir=str(Path("data/raw")),
-        duplicate_approach_id_count=0,
-    )
-    write_metadata(metadata, Path("outputs/metadata.json"))
+        # Written on request only, not on every widget-triggered rerun.
+        metadata_out = Path("outputs/metadata.json")
+        if st.button("Export run metadata"):
+            metadata = build_metadata(
+                df=filtered,
+                input_path=Path("data/processed/approaches.parquet"),
+                orbiting_body_filter=orbiting_body,
+                input_csv_hash="",
+                raw_cache_dir=str(Path("data/raw")),
+                duplicate_approach_id_count=0,
+            )
+            write_metadata(metadata, metadata_out)
+            st.success(f"Metadata written to {metadata_out}")
 
 
 if __name__ == "__main__":
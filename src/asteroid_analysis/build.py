@@ -1,12 +1,18 @@
 import argparse
 import hashlib
-import math
+import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 
 from asteroid_analysis.metadata import build_metadata, write_metadata, _hash_file
-from asteroid_analysis.features import enrich
+from asteroid_analysis.features import add_row_features, enrich
 REQUIRED_COLUMNS = [
     "date",
     "id",
@@ -32,6 +38,7 @@ REQUIRED_COLUMNS = [
     "miss_distance_miles",
     "orbiting_body",
 ]
+REQUIRED_COLUMN_SET = frozenset(REQUIRED_COLUMNS)
 
 OBJECT_COLUMNS = [
     "id",
@@ -69,36 +76,63 @@ APPROACH_COLUMNS = [
 ]
 
 
+# Read as plain strings so process_dataframe parses dates exactly as before;
+# the other columns use Arrow's type inference.
+CSV_STRING_COLUMNS = ["date", "close_approach_date", "close_approach_date_full"]
+
+# Low-cardinality strings stored dictionary-encoded in the merged table.
+MERGED_CATEGORY_COLUMNS = ["name", "orbiting_body", "orbit_class_name"]
+
+
 def _safe_log10(series: pd.Series) -> pd.Series:
-    def to_log(value):
-        if pd.isna(value) or value <= 0:
-            return pd.NA
-        return math.log10(value)
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64")
+    logs = np.full(values.shape, np.nan)
+    np.log10(values, out=logs, where=values > 0)
+    return pd.Series(logs, index=series.index, name=series.name)
 
-    return series.apply(to_log)
 
+BOOL_VALUES = {
+    True: True,
+    False: False,
+    "True": True,
+    "False": False,
+    "true": True,
+    "false": False,
+}
 
-def _first_non_null(series: pd.Series):
-    non_null = series.dropna()
-    if non_null.empty:
-        return pd.NA
-    return non_null.iloc[0]
 
+def _to_bool(series: pd.Series) -> np.ndarray:
+    # Bool columns with or without nulls convert directly; anything else (an
+    # object column from a CSV with blanks) is mapped once. Missing is False.
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return series.fillna(False).to_numpy(dtype=bool)
+    return series.map(BOOL_VALUES).fillna(False).to_numpy(dtype=bool)
 
-def _stable_suffix(row: pd.Series) -> str:
-    parts = [
-        str(row.get("id", "")),
-        str(row.get("close_approach_date", "")),
-        str(row.get("close_approach_date_full", "")),
-        str(row.get("miss_distance_km", "")),
-        str(row.get("velocity_km_s", "")),
+
+SUFFIX_COLUMNS = [
+    "id",
+    "close_approach_date",
+    "close_approach_date_full",
+    "miss_distance_km",
+    "velocity_km_s",
+]
+
+
+def _stable_suffixes(df: pd.DataFrame) -> list[str]:
+    # Values are formatted with str() one by one, as the per-row version did,
+    # so existing approach_ids stay the same.
+    columns = [
+        df[col].tolist() if col in df.columns else [""] * len(df)
+        for col in SUFFIX_COLUMNS
+    ]
+    return [
+        hashlib.md5("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:8]
+        for parts in zip(*columns)
     ]
-    digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
-    return digest[:8]
 
 
 def process_dataframe(df: pd.DataFrame):
-    missing = sorted(set(REQUIRED_COLUMNS) - set(df.columns))
+    missing = sorted(REQUIRED_COLUMN_SET.difference(df.columns))
     if missing:
         raise ValueError(f"Missing required columns: {', '.join(missing)}")
 
@@ -126,30 +160,43 @@ def process_dataframe(df: pd.DataFrame):
     )
 
     for col in ["is_potentially_hazardous_asteroid", "is_sentry_object"]:
-        df[col] = df[col].astype("boolean").fillna(False).astype(bool)
-
-    df["diameter_mid_km"] = (df["diameter_km_min"] + df["diameter_km_max"]) / 2
+        df[col] = _to_bool(df[col])
+
+    km_min = df["diameter_km_min"].to_numpy(dtype="float64")
+    km_max = df["diameter_km_max"].to_numpy(dtype="float64")
+    mid_km = (km_min + km_max) / 2
+    # Zero-diameter rows get NaN directly instead of dividing and patching.
+    ratio = np.full(mid_km.shape, np.nan)
+    np.divide(km_max - km_min, mid_km, out=ratio, where=mid_km != 0)
+    df["diameter_mid_km"] = mid_km
     df["diameter_mid_m"] = (df["diameter_m_min"] + df["diameter_m_max"]) / 2
-    df["diameter_uncertainty_ratio_km"] = (
-        (df["diameter_km_max"] - df["diameter_km_min"]) / df["diameter_mid_km"]
-    )
-    df.loc[df["diameter_mid_km"] == 0, "diameter_uncertainty_ratio_km"] = pd.NA
+    df["diameter_uncertainty_ratio_km"] = ratio
 
+    # The epoch identifies an approach; only rows without one are hashed. The
+    # ids are cast and joined in Arrow rather than as Python strings.
     epoch_series = df["epoch_date_close_approach"]
-    epoch_str = epoch_series.apply(
-        lambda value: str(int(value)) if pd.notna(value) else None
-    )
-    suffix = epoch_str.fillna(
-        df.apply(_stable_suffix, axis=1)
+    missing_epoch = epoch_series.isna().to_numpy()
+    epochs = pa.array(epoch_series.to_numpy(), from_pandas=True)
+    suffix = pc.cast(epochs, pa.int64(), safe=False).cast(pa.string())
+    if missing_epoch.any():
+        fallback = pa.array(_stable_suffixes(df.loc[missing_epoch]), pa.string())
+        suffix = pc.replace_with_mask(suffix, pa.array(missing_epoch), fallback)
+    if pd.api.types.is_integer_dtype(df["id"].dtype):
+        ids = pa.array(df["id"].to_numpy()).cast(pa.string())
+    else:
+        ids = pa.array(df["id"].astype(str)).cast(pa.string())
+    df["approach_id"] = pd.array(
+        pc.binary_join_element_wise(ids, suffix, "_"), dtype="str"
     )
-    df["approach_id"] = df["id"].astype(str) + "_" + suffix
 
     # Remove log columns from the columns to be grouped
     object_fields = [col for col in OBJECT_COLUMNS if col != "id" and col != "log_diameter_mid_km"]
+    # first() takes the first non-null value per column, like the old
+    # per-group Python reducer, but in one Cython pass.
     objects = (
         df[["id"] + object_fields]
         .groupby("id", dropna=False)[object_fields]
-        .agg(_first_non_null)
+        .first()
         .reset_index()
     )
 
@@ -171,30 +218,27 @@ def process_dataframe(df: pd.DataFrame):
     return objects, approaches
 
 
-def compute_aggregates(approaches: pd.DataFrame, objects: pd.DataFrame) -> pd.DataFrame:
-    merged = approaches.merge(
-        objects[["id", "name", "diameter_mid_m", "diameter_mid_km"]],
-        on="id",
-        how="left",
-    )
-    enriched = enrich(merged)
-
+def _monthly_aggregates(enriched: pd.DataFrame) -> pd.DataFrame:
+    # Truncate to month starts with a NumPy cast instead of a Period round trip.
+    dates = enriched["close_approach_date"]
+    month = dates.to_numpy().astype("datetime64[M]").astype(dates.dtype)
     monthly = (
-        enriched.assign(
-            month=enriched["close_approach_date"].dt.to_period("M").dt.to_timestamp()
-        )
+        enriched.assign(month=month)
         .groupby(
             ["orbiting_body", "is_potentially_hazardous_asteroid", "month"],
             dropna=False,
-            observed=False,
+            observed=True,
         )
         .size()
         .reset_index(name="count")
     )
     monthly["aggregate_type"] = "monthly_counts"
+    return monthly
 
+
+def _hazard_rate_aggregates(enriched: pd.DataFrame) -> pd.DataFrame:
     hazard_rate = (
-        enriched.groupby(["orbiting_body", "size_bin_m"], dropna=False, observed=False)
+        enriched.groupby(["orbiting_body", "size_bin_m"], dropna=False, observed=True)
         .agg(
             total=("id", "size"),
             hazardous=("is_potentially_hazardous_asteroid", "sum"),
@@ -203,42 +247,93 @@ def compute_aggregates(approaches: pd.DataFrame, objects: pd.DataFrame) -> pd.Da
     )
     hazard_rate["hazard_rate"] = hazard_rate["hazardous"] / hazard_rate["total"]
     hazard_rate["aggregate_type"] = "hazard_rate_size"
+    return hazard_rate
 
-    top_rows = []
+
+TOP_N = 50
+
+
+def _top_positions(keys: np.ndarray, k: int) -> np.ndarray:
+    # The k smallest keys in order, ties broken by position like
+    # nsmallest(keep="first"). Partitioning finds the cutoff without sorting
+    # the whole column; only the k picked keys are sorted.
+    if keys.size > k:
+        kth = np.partition(keys, k - 1)[k - 1]
+        below = np.flatnonzero(keys < kth)
+        ties = np.flatnonzero(keys == kth)[: k - below.size]
+        positions = np.sort(np.concatenate([below, ties]))
+    else:
+        positions = np.arange(keys.size)
+    return positions[np.argsort(keys[positions], kind="stable")]
+
+
+def _top_n_aggregates(enriched: pd.DataFrame) -> pd.DataFrame:
+    top_columns = [
+        "id",
+        "name",
+        "close_approach_date",
+        "miss_distance_km",
+        "velocity_km_s",
+        "diameter_mid_km",
+        "energy_proxy",
+    ]
     metrics = [
         ("closest", "miss_distance_km", True),
         ("largest", "diameter_mid_km", False),
         ("fastest", "velocity_km_s", False),
         ("energy_proxy", "energy_proxy", False),
     ]
-    for orbit_body, subset in enriched.groupby(
-        "orbiting_body", dropna=False, observed=False
-    ):
-        for metric_name, metric_col, ascending in metrics:
-            if metric_col not in subset.columns:
-                continue
-            ranked = subset.sort_values(metric_col, ascending=ascending).head(50)
-            if ranked.empty:
-                continue
-            ranked = ranked[
-                [
-                    "id",
-                    "name",
-                    "close_approach_date",
-                    "miss_distance_km",
-                    "velocity_km_s",
-                    "diameter_mid_km",
-                    "energy_proxy",
-                ]
-            ].copy()
-            ranked["aggregate_type"] = "top_n"
-            ranked["metric"] = metric_name
-            ranked["orbiting_body"] = orbit_body
-            top_rows.append(ranked)
-
-    top_df = pd.concat(top_rows, ignore_index=True) if top_rows else pd.DataFrame()
-
-    aggregates = pd.concat([monthly, hazard_rate, top_df], ignore_index=True, sort=False)
+    narrow = enriched[top_columns + ["orbiting_body"]]
+    # Positions of each body in category order, with missing bodies last as
+    # sort_values would place them.
+    codes = narrow["orbiting_body"].cat.codes.to_numpy()
+    present = np.unique(codes)
+    present = np.concatenate([present[present >= 0], present[present < 0]])
+    groups = [np.flatnonzero(codes == code) for code in present]
+    if not groups:
+        return pd.DataFrame()
+
+    top_rows = []
+    for metric_name, metric_col, ascending in metrics:
+        values = narrow[metric_col].to_numpy(dtype="float64", na_value=np.nan)
+        keys = values if ascending else -values
+        picks = []
+        for positions in groups:
+            missing = np.isnan(keys[positions])
+            valid = positions[~missing]
+            top = valid[_top_positions(keys[valid], TOP_N)]
+            # Like sort_values().head(), pad with NaN rows once the valid
+            # values run out.
+            padding = positions[missing][: TOP_N - top.size]
+            picks.append(np.concatenate([top, padding]))
+        ranked = narrow.iloc[np.concatenate(picks)]
+        if ranked.empty:
+            continue
+        top_rows.append(
+            ranked[top_columns].assign(
+                aggregate_type="top_n",
+                metric=metric_name,
+                orbiting_body=ranked["orbiting_body"],
+            )
+        )
+
+    return pd.concat(top_rows, ignore_index=True) if top_rows else pd.DataFrame()
+
+
+def compute_aggregates(approaches: pd.DataFrame, objects: pd.DataFrame) -> pd.DataFrame:
+    merged = approaches.merge(
+        objects[["id", "name", "diameter_mid_m", "diameter_mid_km"]],
+        on="id",
+        how="left",
+    )
+    enriched = enrich(merged)
+
+    parts = [
+        _monthly_aggregates(enriched),
+        _hazard_rate_aggregates(enriched),
+        _top_n_aggregates(enriched),
+    ]
+    aggregates = pd.concat(parts, ignore_index=True, sort=False)
     return aggregates
 
 
@@ -257,25 +352,124 @@ def _handle_duplicates(approaches: pd.DataFrame) -> pd.DataFrame:
     )
     approaches.attrs["duplicate_approach_id_count"] = duplicate_id_count
 
-    exact_dupes = approaches.duplicated(keep="first")
+    # Exact duplicates necessarily share an approach_id, so only those rows
+    # are hashed across every column.
+    duplicate_rows = np.flatnonzero(duplicate_mask.to_numpy())
+    exact_dupes = approaches.iloc[duplicate_rows].duplicated(keep="first").to_numpy()
     if exact_dupes.any():
         dropped = int(exact_dupes.sum())
-        approaches = approaches[~exact_dupes]
+        keep = np.ones(len(approaches), dtype=bool)
+        keep[duplicate_rows[exact_dupes]] = False
+        approaches = approaches[keep]
         print(f"Dropped {dropped} exact duplicate rows.")
 
     return approaches
 
 
-def build_tables(input_path: Path, outdir: Path):
-    df = pd.read_csv(input_path)
-    if df.empty:
-        raise ValueError(f"Input CSV is empty: {input_path}")
+def merge_tables(
+    approaches: pd.DataFrame,
+    objects: pd.DataFrame,
+    orbits: pd.DataFrame | None = None,
+) -> pd.DataFrame:
+    object_cols = [col for col in objects.columns if col not in approaches.columns]
+    merged = approaches.merge(objects[["id"] + object_cols], on="id", how="left")
+    if orbits is not None:
+        # Orbit ids come back from the lookup API as strings.
+        orbits = orbits.astype({"id": merged["id"].dtype})
+        merged = merged.merge(orbits, on="id", how="left")
+    for col in MERGED_CATEGORY_COLUMNS:
+        if col in merged.columns:
+            merged[col] = merged[col].astype("category")
+    return merged
+
+
+def write_merged_table(data_dir: Path) -> Path:
+    # approaches + objects (+ orbits) joined once here, with the per-row
+    # feature columns, so the app reads a single table instead of re-running
+    # the merge and binning on every cold start.
+    orbits_path = data_dir / "orbits.parquet"
+    orbits = pd.read_parquet(orbits_path) if orbits_path.exists() else None
+    merged = merge_tables(
+        pd.read_parquet(data_dir / "approaches.parquet"),
+        pd.read_parquet(data_dir / "objects.parquet"),
+        orbits,
+    )
+    add_row_features(merged)
+    merged_path = data_dir / "merged.parquet"
+    merged.to_parquet(merged_path, index=False)
+    return merged_path
+
+
+def read_input_csv(input_path: Path) -> pd.DataFrame:
+    # Arrow's multithreaded CSV reader; empty fields become nulls as they do
+    # with pandas' default parser.
+    table = pv.read_csv(
+        input_path,
+        convert_options=pv.ConvertOptions(
+            column_types={col: pa.string() for col in CSV_STRING_COLUMNS},
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas()
+
+
+def read_input(input_path: Path) -> pd.DataFrame:
+    if input_path.suffix != ".parquet":
+        return read_input_csv(input_path)
+    # Ingest stores the NeoWs ids as strings; cast them to integers the way the
+    # CSV reader infers them so both formats build identical tables.
+    table = pq.read_table(input_path)
+    for col in ["id", "neo_reference_id"]:
+        if col not in table.column_names:
+            continue
+        index = table.column_names.index(col)
+        try:
+            table = table.set_column(index, col, pc.cast(table[col], pa.int64()))
+        except pa.ArrowInvalid:
+            pass
+    return table.to_pandas()
+
+
+BUILD_OUTPUTS = [
+    "objects.parquet",
+    "approaches.parquet",
+    "merged.parquet",
+    "aggregates.parquet",
+]
 
-    missing = sorted(set(REQUIRED_COLUMNS) - set(df.columns))
-    if missing:
-        raise ValueError(
-            f"Input CSV missing required columns: {', '.join(missing)}"
-        )
+
+def _outputs_current(input_hash: str, outdir: Path, emit_csv: bool) -> bool:
+    metadata_path = outdir / "metadata.json"
+    if not metadata_path.exists():
+        return False
+    try:
+        metadata = json.loads(metadata_path.read_text())
+    except json.JSONDecodeError:
+        return False
+    if metadata.get("input_csv_hash") != input_hash:
+        return False
+    names = BUILD_OUTPUTS + (["objects.csv", "approaches.csv"] if emit_csv else [])
+    if not all((outdir / name).exists() for name in names):
+        return False
+    # Orbits fetched after the last build still need joining into merged.
+    orbits_path = outdir / "orbits.parquet"
+    return (
+        not orbits_path.exists()
+        or orbits_path.stat().st_mtime <= (outdir / "merged.parquet").stat().st_mtime
+    )
+
+
+def build_tables(
+    input_path: Path, outdir: Path, emit_csv: bool = False, force: bool = False
+):
+    input_hash = _hash_file(input_path)
+    if not force and _outputs_current(input_hash, outdir, emit_csv):
+        print(f"Input unchanged since the last build; keeping tables in {outdir}")
+        return
+
+    df = read_input(input_path)
+    if df.empty:
+        raise ValueError(f"Input file is empty: {input_path}")
 
     objects, approaches = process_dataframe(df)
 
@@ -283,15 +477,26 @@ def build_tables(input_path: Path, outdir: Path):
     objects_path = outdir / "objects"
     approaches_path = outdir / "approaches"
 
-    objects.to_parquet(f"{objects_path}.parquet", index=False)
-    objects.to_csv(f"{objects_path}.csv", index=False)
-    approaches.to_parquet(f"{approaches_path}.parquet", index=False)
-    approaches.to_csv(f"{approaches_path}.csv", index=False)
+    # Arrow releases the GIL while encoding, so the tables are written side by
+    # side; the CSV copies are only produced on request.
+    writes = [
+        (objects.to_parquet, f"{objects_path}.parquet"),
+        (approaches.to_parquet, f"{approaches_path}.parquet"),
+    ]
+    if emit_csv:
+        writes += [
+            (objects.to_csv, f"{objects_path}.csv"),
+            (approaches.to_csv, f"{approaches_path}.csv"),
+        ]
+    with ThreadPoolExecutor(max_workers=len(writes)) as executor:
+        futures = [executor.submit(write, path, index=False) for write, path in writes]
+        for future in futures:
+            future.result()
+    write_merged_table(outdir)
     aggregates = compute_aggregates(approaches, objects)
     aggregates_path = outdir / "aggregates.parquet"
     aggregates.to_parquet(aggregates_path, index=False)
 
-    input_hash = _hash_file(input_path)
     duplicate_count = int(approaches.attrs.get("duplicate_approach_id_count", 0))
     metadata = build_metadata(
         df=approaches,
@@ -314,17 +519,29 @@ def main():
     parser = argparse.ArgumentParser(description="Build asteroid analysis tables.")
     parser.add_argument(
         "--input",
-        default="asteroid_data_full.csv",
-        help="Path to the input CSV file.",
+        default="asteroid_data_full.parquet",
+        help="Path to the ingest output (parquet or CSV).",
     )
     parser.add_argument(
         "--outdir",
         default="data/processed",
         help="Directory to write processed tables.",
     )
+    parser.add_argument(
+        "--emit-csv",
+        action="store_true",
+        help="Also write objects.csv and approaches.csv next to the parquet files.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild even if the input is unchanged since the last build.",
+    )
     args = parser.parse_args()
 
-    build_tables(Path(args.input), Path(args.outdir))
+    build_tables(
+        Path(args.input), Path(args.outdir), emit_csv=args.emit_csv, force=args.force
+    )
 
 
 if __name__ == "__main__":
@@ -4,12 +4,6 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import subprocess
 
-from asteroid_analysis import ingest
-from asteroid_analysis import build as build_mod
-from asteroid_analysis import reports as reports_mod
-from asteroid_analysis import enrich_orbits
-from asteroid_analysis import learning_reports
-
 
 def _default_dates():
     start_date = datetime.now().date()
@@ -39,32 +33,54 @@ def _require_path(path: Path, label: str):
         raise SystemExit(2)
 
 
+def _dataset_path(args) -> Path:
+    from asteroid_analysis import ingest
+
+    try:
+        return ingest.check_output_format(Path(args.out), args.format)
+    except ValueError as exc:
+        print(exc)
+        raise SystemExit(2)
+
+
 def _parse_date(value: str):
     return datetime.strptime(value, "%Y-%m-%d")
 
 
 def fetch_cmd(args):
+    from asteroid_analysis import ingest
+
     _require_api_key()
     start_date, end_date = _default_dates()
     if args.start and args.end:
         start_date = _parse_date(args.start).date()
         end_date = _parse_date(args.end).date()
 
+    out_path = _dataset_path(args)
     ingest.ingest(
         start_date=start_date,
         end_date=end_date,
         orbiting_body=args.orbiting_body,
-        out_path=Path(args.out),
+        out_path=out_path,
         refresh=args.refresh,
         raw_dir=Path(args.raw_dir),
+        max_workers=args.workers or ingest.FETCH_WORKERS,
+        return_frame=False,
     )
-    _print_summary([("CSV", args.out)])
+    _print_summary([("Dataset", out_path)])
 
 
 def build_cmd(args):
+    from asteroid_analysis import build as build_mod
+
     input_path = Path(args.input)
-    _require_path(input_path, "input CSV")
-    build_mod.build_tables(input_path, Path(args.processed_dir))
+    _require_path(input_path, "input dataset")
+    build_mod.build_tables(
+        input_path,
+        Path(args.processed_dir),
+        emit_csv=args.emit_csv,
+        force=args.force,
+    )
     _print_summary(
         [
             ("Objects parquet", Path(args.processed_dir) / "objects.parquet"),
@@ -76,6 +92,8 @@ def build_cmd(args):
 
 
 def reports_cmd(args):
+    from asteroid_analysis import reports as reports_mod
+
     try:
         reports_mod.build_reports(
             Path(args.reports_dir), args.orbiting_body, Path(args.data_dir)
@@ -101,6 +119,8 @@ def serve_cmd(_args):
 
 
 def learning_cmd(args):
+    from asteroid_analysis import learning_reports
+
     as_of_date = _parse_date(args.as_of_date) if args.as_of_date else None
     learning_reports.build_learning_reports(
         outdir=Path(args.learning_outdir),
@@ -125,6 +145,8 @@ def learning_cmd(args):
 
 
 def enrich_cmd(args):
+    from asteroid_analysis import enrich_orbits
+
     _require_api_key()
     _require_path(Path(args.processed_dir) / "objects.parquet", "objects.parquet")
     enrich_orbits.build_orbits(
@@ -132,27 +154,34 @@ def enrich_cmd(args):
         objects_path=Path(args.processed_dir) / "objects.parquet",
         raw_dir=Path(args.raw_dir),
         refresh=args.refresh,
+        max_workers=args.workers or enrich_orbits.LOOKUP_WORKERS,
     )
     _print_summary([("Orbits parquet", args.out)])
 
 
 def all_cmd(args):
+    from asteroid_analysis import build as build_mod
+    from asteroid_analysis import ingest, learning_reports
+    from asteroid_analysis import reports as reports_mod
+
     _require_api_key()
     start_date, end_date = _default_dates()
     if args.start and args.end:
         start_date = _parse_date(args.start).date()
         end_date = _parse_date(args.end).date()
 
-    csv_path = Path(args.out)
+    dataset_path = _dataset_path(args)
     ingest.ingest(
         start_date=start_date,
         end_date=end_date,
         orbiting_body=args.orbiting_body,
-        out_path=csv_path,
+        out_path=dataset_path,
         refresh=args.refresh,
         raw_dir=Path(args.raw_dir),
+        max_workers=args.workers or ingest.FETCH_WORKERS,
+        return_frame=False,
     )
-    build_mod.build_tables(csv_path, Path(args.processed_dir))
+    build_mod.build_tables(dataset_path, Path(args.processed_dir), force=args.force)
     reports_mod.build_reports(
         Path(args.reports_dir), args.orbiting_body, Path(args.processed_dir)
     )
@@ -166,7 +195,7 @@ def all_cmd(args):
 
     _print_summary(
         [
-            ("CSV", csv_path),
+            ("Dataset", dataset_path),
             ("Processed dir", args.processed_dir),
             ("Reports dir", args.reports_dir),
             ("Learning dir", args.learning_outdir),
@@ -175,6 +204,8 @@ def all_cmd(args):
 
 
 def main():
+    # Command modules pull in pandas, plotting and HTTP stacks, so each command
+    # imports its own on first use and --help stays cheap.
     parser = argparse.ArgumentParser(description="Asteroid analysis CLI.")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
@@ -182,14 +213,20 @@ def main():
     fetch_parser.add_argument("--start", help="Start date YYYY-MM-DD (inclusive).")
     fetch_parser.add_argument("--end", help="End date YYYY-MM-DD (inclusive).")
     fetch_parser.add_argument("--orbiting-body", default="Earth")
-    fetch_parser.add_argument("--out", default="asteroid_data_full.csv")
+    fetch_parser.add_argument("--out", default="asteroid_data_full.parquet")
+    fetch_parser.add_argument(
+        "--format", choices=["parquet", "csv"], default=None
+    )
     fetch_parser.add_argument("--raw-dir", default="data/raw")
     fetch_parser.add_argument("--refresh", action="store_true")
+    fetch_parser.add_argument("--workers", type=int, default=None)
     fetch_parser.set_defaults(func=fetch_cmd)
 
     build_parser = subparsers.add_parser("build", help="Build processed tables.")
-    build_parser.add_argument("--input", default="asteroid_data_full.csv")
+    build_parser.add_argument("--input", default="asteroid_data_full.parquet")
     build_parser.add_argument("--processed-dir", default="data/processed")
+    build_parser.add_argument("--emit-csv", action="store_true")
+    build_parser.add_argument("--force", action="store_true")
     build_parser.set_defaults(func=build_cmd)
 
     reports_parser = subparsers.add_parser("reports", help="Generate reports.")
@@ -219,13 +256,17 @@ def main():
     enrich_parser.add_argument("--raw-dir", default="data/raw")
     enrich_parser.add_argument("--out", default="data/processed/orbits.parquet")
     enrich_parser.add_argument("--refresh", action="store_true")
+    enrich_parser.add_argument("--workers", type=int, default=None)
     enrich_parser.set_defaults(func=enrich_cmd)
 
     all_parser = subparsers.add_parser("all", help="Fetch, build, and report.")
     all_parser.add_argument("--start", help="Start date YYYY-MM-DD (inclusive).")
     all_parser.add_argument("--end", help="End date YYYY-MM-DD (inclusive).")
     all_parser.add_argument("--orbiting-body", default="Earth")
-    all_parser.add_argument("--out", default="asteroid_data_full.csv")
+    all_parser.add_argument("--out", default="asteroid_data_full.parquet")
+    all_parser.add_argument(
+        "--format", choices=["parquet", "csv"], default=None
+    )
     all_parser.add_argument("--raw-dir", default="data/raw")
     all_parser.add_argument("--processed-dir", default="data/processed")
     all_parser.add_argument("--reports-dir", default="outputs/reports")
@@ -234,6 +275,8 @@ def main():
         "--as-of-date", help="Anchor date for watchlist (YYYY-MM-DD)."
     )
     all_parser.add_argument("--refresh", action="store_true")
+    all_parser.add_argument("--force", action="store_true")
+    all_parser.add_argument("--workers", type=int, default=None)
     all_parser.set_defaults(func=all_cmd)
 
     args = parser.parse_args()
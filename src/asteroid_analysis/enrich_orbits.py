@@ -1,15 +1,20 @@
 import argparse
 import json
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pandas as pd
 import requests
 
+from asteroid_analysis.build import write_merged_table
+from asteroid_analysis.ingest import build_session
 
 LOOKUP_URL = "https://api.nasa.gov/neo/rest/v1/neo/{}"
 RAW_DIR = Path("data/raw")
+# Lookups are independent and latency bound; a handful in flight overlaps the
+# round trips without tripping the API rate limits.
+LOOKUP_WORKERS = 8
 
 ORBIT_COLUMNS = [
     "id",
@@ -31,28 +36,16 @@ ORBIT_COLUMNS = [
 
 
 def fetch_orbit(session: requests.Session, neo_id: str, api_key: str):
+    # Retries and backoff come from the session built by ingest.build_session.
     url = LOOKUP_URL.format(neo_id)
     params = {"api_key": api_key}
-    max_retries = 5
-    for attempt in range(max_retries + 1):
-        try:
-            response = session.get(url, params=params, timeout=30)
-        except requests.RequestException as exc:
-            if attempt == max_retries:
-                raise RuntimeError(f"Request error: {exc}") from exc
-            time.sleep(2**attempt)
-            continue
-
-        if response.status_code == 200:
-            return response.json()
-        if response.status_code == 429 or 500 <= response.status_code < 600:
-            if attempt == max_retries:
-                raise RuntimeError(
-                    f"API error {response.status_code}: {response.text}"
-                )
-            time.sleep(2**attempt)
-            continue
+    try:
+        response = session.get(url, params=params, timeout=30)
+    except requests.RequestException as exc:
+        raise RuntimeError(f"Request error: {exc}") from exc
+    if response.status_code != 200:
         raise RuntimeError(f"API error {response.status_code}: {response.text}")
+    return response.json()
 
 
 def fetch_or_load_orbit(
@@ -73,26 +66,43 @@ def fetch_or_load_orbit(
     return cache_path
 
 
-def extract_orbit_fields(payload: dict) -> dict:
-    orbital = payload.get("orbital_data", {}) if isinstance(payload, dict) else {}
-    orbit_class = orbital.get("orbit_class", {}) if isinstance(orbital, dict) else {}
-    return {
-        "id": payload.get("id"),
-        "orbit_id": orbital.get("orbit_id"),
-        "orbit_class_name": orbit_class.get("orbit_class_name"),
-        "orbit_class_type": orbit_class.get("orbit_class_type"),
-        "orbit_class_description": orbit_class.get("orbit_class_description"),
-        "semi_major_axis": orbital.get("semi_major_axis"),
-        "eccentricity": orbital.get("eccentricity"),
-        "inclination": orbital.get("inclination"),
-        "perihelion_distance": orbital.get("perihelion_distance"),
-        "aphelion_distance": orbital.get("aphelion_distance"),
-        "minimum_orbit_intersection": orbital.get("minimum_orbit_intersection"),
-        "orbital_period": orbital.get("orbital_period"),
-        "mean_anomaly": orbital.get("mean_anomaly"),
-        "ascending_node_longitude": orbital.get("ascending_node_longitude"),
-        "perihelion_argument": orbital.get("perihelion_argument"),
-    }
+ORBIT_NUMERIC_COLUMNS = [
+    "semi_major_axis",
+    "eccentricity",
+    "inclination",
+    "perihelion_distance",
+    "aphelion_distance",
+    "minimum_orbit_intersection",
+    "orbital_period",
+    "mean_anomaly",
+    "ascending_node_longitude",
+    "perihelion_argument",
+]
+
+# Flattened json_normalize names -> ORBIT_COLUMNS names.
+ORBIT_FIELD_NAMES = {
+    "orbital_data_orbit_id": "orbit_id",
+    "orbital_data_orbit_class_orbit_class_name": "orbit_class_name",
+    "orbital_data_orbit_class_orbit_class_type": "orbit_class_type",
+    "orbital_data_orbit_class_orbit_class_description": "orbit_class_description",
+    "orbital_data_semi_major_axis": "semi_major_axis",
+    "orbital_data_eccentricity": "eccentricity",
+    "orbital_data_inclination": "inclination",
+    "orbital_data_perihelion_distance": "perihelion_distance",
+    "orbital_data_aphelion_distance": "aphelion_distance",
+    "orbital_data_minimum_orbit_intersection": "minimum_orbit_intersection",
+    "orbital_data_orbital_period": "orbital_period",
+    "orbital_data_mean_anomaly": "mean_anomaly",
+    "orbital_data_ascending_node_longitude": "ascending_node_longitude",
+    "orbital_data_perihelion_argument": "perihelion_argument",
+}
+
+
+def orbits_frame(payloads: list) -> pd.DataFrame:
+    # One json_normalize pass over every payload; orbit_class sits two levels
+    # down, so deeper nesting is left alone.
+    df = pd.json_normalize(payloads, sep="_", max_level=2)
+    return df.rename(columns=ORBIT_FIELD_NAMES).reindex(columns=ORBIT_COLUMNS)
 
 
 def build_orbits(
@@ -100,17 +110,26 @@ def build_orbits(
     objects_path: Path = Path("data/processed/objects.parquet"),
     raw_dir: Path = RAW_DIR,
     refresh: bool = False,
+    max_workers: int = LOOKUP_WORKERS,
 ):
     api_key = os.getenv("NASA_API_KEY")
     if not api_key:
         raise RuntimeError("NASA_API_KEY environment variable not set.")
 
-    objects = pd.read_parquet(objects_path)
+    objects = pd.read_parquet(objects_path, columns=["id"])
     ids = objects["id"].astype(str).dropna().unique().tolist()
 
-    rows = []
-    with requests.Session() as session:
-        for neo_id in ids:
+    # Rows from the previous orbits table are reused rather than re-reading one
+    # raw JSON file per object; only ids it lacks go through the raw cache.
+    previous = None
+    if not refresh and out_path.exists():
+        previous = pd.read_parquet(out_path).reindex(columns=ORBIT_COLUMNS)
+        previous = previous[previous["id"].astype(str).isin(ids)]
+        known = set(previous["id"].astype(str))
+        ids = [neo_id for neo_id in ids if neo_id not in known]
+
+    with build_session(max_workers) as session:
+        def load(neo_id):
             cache_path = fetch_or_load_orbit(
                 session=session,
                 neo_id=neo_id,
@@ -118,27 +137,32 @@ def build_orbits(
                 raw_dir=raw_dir,
                 refresh=refresh,
             )
-            payload = json.loads(cache_path.read_text())
-            rows.append(extract_orbit_fields(payload))
-
-    df = pd.DataFrame(rows, columns=ORBIT_COLUMNS)
-    numeric_cols = [
-        "semi_major_axis",
-        "eccentricity",
-        "inclination",
-        "perihelion_distance",
-        "aphelion_distance",
-        "minimum_orbit_intersection",
-        "orbital_period",
-        "mean_anomaly",
-        "ascending_node_longitude",
-        "perihelion_argument",
-    ]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+            return json.loads(cache_path.read_text())
+
+        # executor.map keeps payloads in id order.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            payloads = list(executor.map(load, ids))
+
+    df = orbits_frame(payloads)
+    try:
+        df = df.astype(dict.fromkeys(ORBIT_NUMERIC_COLUMNS, "float64"))
+    except (TypeError, ValueError):
+        # A malformed value somewhere; fall back to coercing it to NaN.
+        for col in ORBIT_NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    if previous is not None:
+        df = pd.concat([previous, df], ignore_index=True) if payloads else previous
+    # Orbital elements carry far fewer significant digits than float64 holds,
+    # so they are stored as float32 to halve the numeric columns.
+    df = df.astype(dict.fromkeys(ORBIT_NUMERIC_COLUMNS, "float32"))
+    # Stored dictionary-encoded so readers get categoricals back.
+    for col in ["orbit_class_name", "orbit_class_type"]:
+        df[col] = df[col].astype("category")
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(out_path, index=False)
+    df.to_parquet(out_path, index=False, compression="zstd")
+    if (out_path.parent / "approaches.parquet").exists():
+        write_merged_table(out_path.parent)
     return df
 
 
@@ -156,9 +180,15 @@ def main():
         action="store_true",
         help="Re-fetch cached orbit data.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=LOOKUP_WORKERS,
+        help="Number of orbit lookups run concurrently.",
+    )
     args = parser.parse_args()
 
-    build_orbits(Path(args.out), refresh=args.refresh)
+    build_orbits(Path(args.out), refresh=args.refresh, max_workers=args.workers)
 
 
 if __name__ == "__main__":
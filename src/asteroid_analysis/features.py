@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 
@@ -11,44 +12,85 @@ VELOCITY_BINS_KMS = [-float("inf"), 10, 20, 30, float("inf")]
 VELOCITY_LABELS_KMS = ["<10", "10-20", "20-30", ">30"]
 
 
+def _bin_dtype(labels: list[str]) -> pd.CategoricalDtype:
+    return pd.CategoricalDtype(labels, ordered=True)
+
+
+# Built once so each binning call reuses the edges and category dtype.
+_BIN_SPECS = {
+    "miss_ld_bin": (np.array(MISS_LD_BINS), _bin_dtype(MISS_LD_LABELS)),
+    "size_bin_m": (np.array(SIZE_BINS_M), _bin_dtype(SIZE_LABELS_M)),
+    "velocity_bin_kms": (np.array(VELOCITY_BINS_KMS), _bin_dtype(VELOCITY_LABELS_KMS)),
+}
+
+
+def _cut(series: pd.Series, column: str) -> pd.Categorical:
+    # Same bins as pd.cut(..., right=False): each value goes into [lo, hi), and
+    # NaN or values past the last edge get no bin.
+    edges, dtype = _BIN_SPECS[column]
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    codes = np.searchsorted(edges, values, side="right") - 1
+    codes[np.isnan(values) | (codes >= len(dtype.categories))] = -1
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
+
 def _normalize_rank(series: pd.Series, ascending: bool) -> pd.Series:
-    ranks = series.rank(method="average", ascending=ascending, na_option="keep")
-    min_rank = ranks.min()
-    max_rank = ranks.max()
-    if pd.isna(min_rank) or pd.isna(max_rank) or max_rank == min_rank:
-        return ranks * 0
-    return (ranks - min_rank) / (max_rank - min_rank)
+    # Average ranks (as Series.rank(method="average")) from one sort: every run
+    # of equal values gets the mean of the positions it spans.
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(values)
+    keys = values[valid] if ascending else -values[valid]
+    ranks = np.full(values.shape, np.nan)
+    if keys.size:
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], keys.size]
+        run_ranks = (starts + ends + 1) / 2
+        valid_ranks = np.empty(keys.size)
+        valid_ranks[order] = np.repeat(run_ranks, ends - starts)
+        ranks[valid] = valid_ranks
+        min_rank, max_rank = run_ranks[0], run_ranks[-1]
+        if max_rank != min_rank:
+            ranks = (ranks - min_rank) / (max_rank - min_rank)
+        else:
+            ranks[valid] = 0.0
+    return pd.Series(ranks, index=series.index, name=series.name)
 
 
-def enrich(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
+# Columns computed from each row on its own, so they can be derived once for the
+# full table; the rank columns below depend on which rows are present.
+ROW_FEATURE_COLUMNS = [
+    "miss_distance_ld",
+    "miss_ld_bin",
+    "size_bin_m",
+    "velocity_bin_kms",
+    "energy_proxy",
+]
+
 
+def add_row_features(df: pd.DataFrame) -> pd.DataFrame:
     df["miss_distance_ld"] = df["miss_distance_lunar"]
-    df["miss_ld_bin"] = pd.cut(
-        df["miss_distance_ld"],
-        bins=MISS_LD_BINS,
-        labels=MISS_LD_LABELS,
-        right=False,
-    )
-    df["miss_ld_bin"] = df["miss_ld_bin"].astype("category")
-    df["size_bin_m"] = pd.cut(
-        df["diameter_mid_m"],
-        bins=SIZE_BINS_M,
-        labels=SIZE_LABELS_M,
-        right=False,
-    )
-    df["size_bin_m"] = df["size_bin_m"].astype("category")
-    df["velocity_bin_kms"] = pd.cut(
-        df["velocity_km_s"],
-        bins=VELOCITY_BINS_KMS,
-        labels=VELOCITY_LABELS_KMS,
-        right=False,
-    )
-    df["velocity_bin_kms"] = df["velocity_bin_kms"].astype("category")
+    df["miss_ld_bin"] = _cut(df["miss_distance_ld"], "miss_ld_bin")
+    df["size_bin_m"] = _cut(df["diameter_mid_m"], "size_bin_m")
+    df["velocity_bin_kms"] = _cut(df["velocity_km_s"], "velocity_bin_kms")
 
-    df["energy_proxy"] = (df["diameter_mid_m"] ** 3) * (
-        (df["velocity_km_s"] * 1000) ** 2
-    )
+    # diameter^3 * (velocity in m/s)^2 with two buffers, squaring and
+    # multiplying in place.
+    diameter = df["diameter_mid_m"].to_numpy(dtype="float64", na_value=np.nan)
+    velocity = df["velocity_km_s"].to_numpy(dtype="float64", na_value=np.nan)
+    energy = np.power(diameter, 3)
+    speed = np.multiply(velocity, 1000.0)
+    np.square(speed, out=speed)
+    np.multiply(energy, speed, out=energy)
+    df["energy_proxy"] = energy
+    return df
+
+
+def enrich(df: pd.DataFrame) -> pd.DataFrame:
+    # A shallow copy is enough: with copy-on-write, columns set here never
+    # write through to the caller's frame.
+    df = add_row_features(df.copy(deep=False))
 
     rank_close = 1 - _normalize_rank(df["miss_distance_km"], ascending=True)
     rank_size = _normalize_rank(df["diameter_mid_m"], ascending=True)
@@ -66,3 +108,24 @@ def enrich(df: pd.DataFrame) -> pd.DataFrame:
         df["orbit_class_name"] = df["orbit_class_name"].astype("category")
 
     return df
+
+
+def cap_scatter_points(df: pd.DataFrame, limit: int) -> pd.DataFrame:
+    # Keep every hazardous approach and fill the rest of the budget with a
+    # uniform sample of the others; hazardous rows are only sampled when they
+    # alone exceed the limit.
+    if len(df) <= limit:
+        return df
+    rng = np.random.default_rng(42)
+    hazardous = (
+        df["is_potentially_hazardous_asteroid"].fillna(False).to_numpy(dtype=bool)
+    )
+    keep = np.flatnonzero(hazardous)
+    others = np.flatnonzero(~hazardous)
+    if len(keep) >= limit:
+        keep = rng.choice(keep, size=limit, replace=False)
+    else:
+        keep = np.concatenate(
+            [keep, rng.choice(others, size=limit - len(keep), replace=False)]
+        )
+    return df.iloc[np.sort(keep)]
@@ -1,18 +1,33 @@
 import argparse
 import csv
-import json
 import os
-import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
 from pathlib import Path
 
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
+
+from asteroid_analysis.loaders import CSV_COLUMN_TYPES
 
 
 FEED_URL = "https://api.nasa.gov/neo/rest/v1/feed"
 RAW_DIR = Path("data/raw")
+# Feed requests are I/O bound and independent; keep the fan-out modest so the
+# API rate limit, not the client, is the bottleneck.
+FETCH_WORKERS = 8
+MAX_RETRIES = 5
+RETRY_STATUSES = [429, *range(500, 600)]
+
+_FAILURES_LOCK = threading.Lock()
 
 SCHEMA_COLUMNS = [
     "date",
@@ -40,6 +55,65 @@ SCHEMA_COLUMNS = [
     "orbiting_body",
 ]
 
+# Fixed Arrow schema so every streamed chunk lands in the same parquet columns,
+# even when a week has no values for some field.
+FEED_SCHEMA = pa.schema([(col, CSV_COLUMN_TYPES[col]) for col in SCHEMA_COLUMNS])
+
+NUMERIC_COLUMNS = [
+    "absolute_magnitude_h",
+    "diameter_km_min",
+    "diameter_km_max",
+    "diameter_m_min",
+    "diameter_m_max",
+    "epoch_date_close_approach",
+    "velocity_km_s",
+    "velocity_km_h",
+    "velocity_mph",
+    "miss_distance_astronomical",
+    "miss_distance_lunar",
+    "miss_distance_km",
+    "miss_distance_miles",
+]
+
+# SCHEMA_COLUMNS name -> key path into a feed asteroid; these are carried onto
+# every close-approach row of that asteroid.
+ASTEROID_FIELDS = {
+    "id": ("id",),
+    "neo_reference_id": ("neo_reference_id",),
+    "name": ("name",),
+    "nasa_jpl_url": ("nasa_jpl_url",),
+    "absolute_magnitude_h": ("absolute_magnitude_h",),
+    "is_potentially_hazardous_asteroid": ("is_potentially_hazardous_asteroid",),
+    "is_sentry_object": ("is_sentry_object",),
+    "diameter_km_min": ("estimated_diameter", "kilometers", "estimated_diameter_min"),
+    "diameter_km_max": ("estimated_diameter", "kilometers", "estimated_diameter_max"),
+    "diameter_m_min": ("estimated_diameter", "meters", "estimated_diameter_min"),
+    "diameter_m_max": ("estimated_diameter", "meters", "estimated_diameter_max"),
+}
+
+# close_approach_data key -> SCHEMA_COLUMNS name.
+APPROACH_FIELDS = {
+    "close_approach_date": "close_approach_date",
+    "close_approach_date_full": "close_approach_date_full",
+    "epoch_date_close_approach": "epoch_date_close_approach",
+    "orbiting_body": "orbiting_body",
+}
+
+# Nested close_approach_data dicts -> their keys -> SCHEMA_COLUMNS names.
+APPROACH_NESTED_FIELDS = {
+    "relative_velocity": {
+        "kilometers_per_second": "velocity_km_s",
+        "kilometers_per_hour": "velocity_km_h",
+        "miles_per_hour": "velocity_mph",
+    },
+    "miss_distance": {
+        "astronomical": "miss_distance_astronomical",
+        "lunar": "miss_distance_lunar",
+        "kilometers": "miss_distance_km",
+        "miles": "miss_distance_miles",
+    },
+}
+
 
 class FetchError(RuntimeError):
     def __init__(
@@ -65,48 +139,59 @@ def chunk_date_ranges(start_date: date, end_date: date, days: int = 7):
         current = chunk_end + timedelta(days=1)
 
 
+def build_session(max_workers: int = FETCH_WORKERS) -> requests.Session:
+    # One keep-alive pool for the single NeoWs host, sized for the fetch
+    # workers so TLS handshakes are paid once per connection, not per chunk.
+    # Throttled and 5xx responses are retried inside urllib3 with exponential
+    # backoff, honouring Retry-After; once retries run out the last response
+    # is returned so callers can still report its status.
+    retries = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=1,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.headers.update({"Accept-Encoding": "gzip"})
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=max_workers, max_retries=retries
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+def _retry_count(response: requests.Response) -> int:
+    retries = getattr(response.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
 def fetch_chunk(session: requests.Session, start_date: date, end_date: date, api_key: str):
     params = {
         "start_date": start_date.isoformat(),
         "end_date": end_date.isoformat(),
         "api_key": api_key,
     }
-    max_retries = 5
-    for attempt in range(max_retries + 1):
-        try:
-            response = session.get(FEED_URL, params=params, timeout=30)
-        except requests.RequestException as exc:
-            if attempt == max_retries:
-                raise FetchError(
-                    f"Request error: {exc}",
-                    category="network",
-                    retry_attempt=attempt,
-                    max_retries=max_retries,
-                ) from exc
-            time.sleep(2**attempt)
-            continue
-
-        if response.status_code == 200:
-            return response.json()
-        if response.status_code == 429 or 500 <= response.status_code < 600:
-            if attempt == max_retries:
-                category = "throttle" if response.status_code == 429 else "unknown"
-                raise FetchError(
-                    f"API error {response.status_code}: {response.text}",
-                    category=category,
-                    http_status=response.status_code,
-                    retry_attempt=attempt,
-                    max_retries=max_retries,
-                )
-            time.sleep(2**attempt)
-            continue
+    try:
+        response = session.get(FEED_URL, params=params, timeout=30)
+    except requests.RequestException as exc:
         raise FetchError(
-            f"API error {response.status_code}: {response.text}",
-            category="unknown",
-            http_status=response.status_code,
-            retry_attempt=attempt,
-            max_retries=max_retries,
-        )
+            f"Request error: {exc}",
+            category="network",
+            retry_attempt=MAX_RETRIES,
+            max_retries=MAX_RETRIES,
+        ) from exc
+
+    if response.status_code == 200:
+        return orjson.loads(response.content)
+    raise FetchError(
+        f"API error {response.status_code}: {response.text}",
+        category="throttle" if response.status_code == 429 else "unknown",
+        http_status=response.status_code,
+        retry_attempt=_retry_count(response),
+        max_retries=MAX_RETRIES,
+    )
 
 
 def _write_failure(
@@ -120,8 +205,8 @@ def _write_failure(
     max_retries: int | None = None,
 ):
     failures_path = raw_dir / "failures.csv"
-    write_header = not failures_path.exists()
-    with failures_path.open("a", newline="") as handle:
+    with _FAILURES_LOCK, failures_path.open("a", newline="") as handle:
+        write_header = handle.tell() == 0
         writer = csv.writer(handle)
         if write_header:
             writer.writerow(
@@ -178,8 +263,8 @@ def _read_cache_payload(
     cache_path: Path, raw_dir: Path, start_date: date | None, end_date: date | None
 ):
     try:
-        payload = json.loads(cache_path.read_text())
-    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        payload = orjson.loads(cache_path.read_bytes())
+    except orjson.JSONDecodeError as exc:
         error = f"Corrupt cache JSON {cache_path}: {exc}"
         print(error)
         _write_failure(raw_dir, start_date, end_date, error, category="corrupt-cache")
@@ -198,11 +283,11 @@ def _read_cache_payload(
 
 def _write_cache_atomic(cache_path: Path, payload: dict):
     temp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
-    temp_path.write_text(json.dumps(payload))
+    temp_path.write_bytes(orjson.dumps(payload))
     temp_path.replace(cache_path)
 
 
-def fetch_or_load_chunk(
+def _load_chunk(
     session: requests.Session,
     start_date: date,
     end_date: date,
@@ -216,7 +301,7 @@ def fetch_or_load_chunk(
     if cache_path.exists() and not refresh:
         cached_payload = _read_cache_payload(cache_path, raw_dir, start_date, end_date)
         if cached_payload is not None:
-            return cache_path
+            return cache_path, cached_payload
 
     try:
         payload = fetcher(session, start_date, end_date, api_key)
@@ -242,16 +327,28 @@ def fetch_or_load_chunk(
             retry_attempt=retry_attempt,
             max_retries=max_retries,
         )
-        return None
+        return None, None
 
     _write_cache_atomic(cache_path, payload)
-    return cache_path
+    return cache_path, payload
 
 
-def build_dataframe_from_cache(cache_paths, orbiting_body: str) -> pd.DataFrame:
-    rows = []
-    include_all = orbiting_body.lower() == "all"
+def fetch_or_load_chunk(
+    session: requests.Session,
+    start_date: date,
+    end_date: date,
+    api_key: str,
+    raw_dir: Path,
+    refresh: bool,
+    fetcher=fetch_chunk,
+):
+    cache_path, _ = _load_chunk(
+        session, start_date, end_date, api_key, raw_dir, refresh, fetcher
+    )
+    return cache_path
+
 
+def _iter_cache_frames(cache_paths):
     for cache_path in cache_paths:
         if cache_path is None or not Path(cache_path).exists():
             continue
@@ -260,88 +357,138 @@ def build_dataframe_from_cache(cache_paths, orbiting_body: str) -> pd.DataFrame:
         data = _read_cache_payload(cache_path, RAW_DIR, start_date, end_date)
         if data is None:
             continue
-        neo_map = data.get("near_earth_objects", {})
-
-        for _, asteroids in neo_map.items():
-            for asteroid in asteroids:
-                est_diam = asteroid.get("estimated_diameter", {})
-                km = est_diam.get("kilometers", {})
-                m = est_diam.get("meters", {})
-                approaches = asteroid.get("close_approach_data", []) or []
-                for approach in approaches:
-                    orbit_body = approach.get("orbiting_body")
-                    if not include_all and orbit_body != orbiting_body:
-                        continue
-
-                    close_date = approach.get("close_approach_date")
-                    row = {
-                        "date": close_date,
-                        "id": asteroid.get("id"),
-                        "neo_reference_id": asteroid.get("neo_reference_id"),
-                        "name": asteroid.get("name"),
-                        "nasa_jpl_url": asteroid.get("nasa_jpl_url"),
-                        "absolute_magnitude_h": asteroid.get("absolute_magnitude_h"),
-                        "is_potentially_hazardous_asteroid": asteroid.get(
-                            "is_potentially_hazardous_asteroid"
-                        ),
-                        "is_sentry_object": asteroid.get("is_sentry_object"),
-                        "diameter_km_min": km.get("estimated_diameter_min"),
-                        "diameter_km_max": km.get("estimated_diameter_max"),
-                        "diameter_m_min": m.get("estimated_diameter_min"),
-                        "diameter_m_max": m.get("estimated_diameter_max"),
-                        "close_approach_date": close_date,
-                        "close_approach_date_full": approach.get(
-                            "close_approach_date_full"
-                        ),
-                        "epoch_date_close_approach": approach.get(
-                            "epoch_date_close_approach"
-                        ),
-                        "velocity_km_s": approach.get("relative_velocity", {}).get(
-                            "kilometers_per_second"
-                        ),
-                        "velocity_km_h": approach.get("relative_velocity", {}).get(
-                            "kilometers_per_hour"
-                        ),
-                        "velocity_mph": approach.get("relative_velocity", {}).get(
-                            "miles_per_hour"
-                        ),
-                        "miss_distance_astronomical": approach.get("miss_distance", {}).get(
-                            "astronomical"
-                        ),
-                        "miss_distance_lunar": approach.get("miss_distance", {}).get(
-                            "lunar"
-                        ),
-                        "miss_distance_km": approach.get("miss_distance", {}).get(
-                            "kilometers"
-                        ),
-                        "miss_distance_miles": approach.get("miss_distance", {}).get(
-                            "miles"
-                        ),
-                        "orbiting_body": orbit_body,
-                    }
-                    rows.append(row)
-
-    df = pd.DataFrame(rows, columns=SCHEMA_COLUMNS)
-    numeric_cols = [
-        "absolute_magnitude_h",
-        "diameter_km_min",
-        "diameter_km_max",
-        "diameter_m_min",
-        "diameter_m_max",
-        "epoch_date_close_approach",
-        "velocity_km_s",
-        "velocity_km_h",
-        "velocity_mph",
-        "miss_distance_astronomical",
-        "miss_distance_lunar",
-        "miss_distance_km",
-        "miss_distance_miles",
-    ]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+        frame = _payload_frame(data)
+        if frame is not None:
+            yield frame
+
+
+def _dig(record, path):
+    for key in path:
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+def _payload_frame(data: dict) -> pd.DataFrame | None:
+    # Values go straight into one list per column instead of per-row dicts;
+    # asteroid fields are looked up once and repeated for each approach.
+    columns = {col: [] for col in SCHEMA_COLUMNS if col != "date"}
+    for day_asteroids in data.get("near_earth_objects", {}).values():
+        for asteroid in day_asteroids:
+            approaches = asteroid.get("close_approach_data")
+            if not approaches:
+                continue
+            meta = [
+                (columns[col], _dig(asteroid, path))
+                for col, path in ASTEROID_FIELDS.items()
+            ]
+            for approach in approaches:
+                for values, value in meta:
+                    values.append(value)
+                for key, col in APPROACH_FIELDS.items():
+                    columns[col].append(approach.get(key))
+                # Each nested dict is fetched once per approach, not per field.
+                for parent, fields in APPROACH_NESTED_FIELDS.items():
+                    nested = approach.get(parent)
+                    if not isinstance(nested, dict):
+                        nested = {}
+                    for key, col in fields.items():
+                        columns[col].append(nested.get(key))
+    if not columns["id"]:
+        return None
+    return pd.DataFrame(columns)
+
+
+def _to_schema(df: pd.DataFrame, orbiting_body: str) -> pd.DataFrame:
+    df = df.reindex(columns=SCHEMA_COLUMNS).infer_objects()
+    df["date"] = df["close_approach_date"]
+    if orbiting_body.lower() != "all":
+        df = df[df["orbiting_body"] == orbiting_body].reset_index(drop=True)
+
+    try:
+        df = df.astype(dict.fromkeys(NUMERIC_COLUMNS, "float64"))
+    except (TypeError, ValueError):
+        # A malformed value somewhere; fall back to coercing it to NaN.
+        for col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
     return df
 
 
+def build_dataframe_from_cache(cache_paths, orbiting_body: str) -> pd.DataFrame:
+    frames = list(_iter_cache_frames(cache_paths))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return _to_schema(df, orbiting_body)
+
+
+def write_csv_from_cache(
+    cache_paths, orbiting_body: str, out_path: Path, keep_frames: bool = False
+):
+    return _write_frames(
+        _iter_cache_frames(cache_paths), orbiting_body, out_path, keep_frames
+    )
+
+
+def check_output_format(out_path: Path, output_format: str | None) -> Path:
+    # The writer goes by the suffix, so an explicit --format has to agree with
+    # it; the path the user asked for is never rewritten.
+    if output_format is not None and (output_format == "parquet") != (
+        out_path.suffix == ".parquet"
+    ):
+        raise ValueError(
+            f"--format {output_format} does not match the output path {out_path}; "
+            f"use a .{output_format} path or drop --format."
+        )
+    return out_path
+
+
+def _map_bounded(executor: ThreadPoolExecutor, fn, items, window: int):
+    # Like executor.map, results come back in input order, but at most
+    # `window` calls are in flight, so finished results cannot pile up
+    # behind a slow chunk.
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _write_frames(frames, orbiting_body: str, out_path: Path, keep_frames: bool):
+    # Append one chunk at a time; with the bounded fetch in ingest() peak
+    # memory is a handful of weeks of approaches, not the whole range.
+    # A .parquet path gets a zstd-compressed parquet file, anything else CSV.
+    kept = []
+    if out_path.suffix == ".parquet":
+        with pq.ParquetWriter(out_path, FEED_SCHEMA, compression="zstd") as writer:
+            for frame in frames:
+                frame = _to_schema(frame, orbiting_body)
+                writer.write_table(
+                    pa.Table.from_pandas(
+                        frame, schema=FEED_SCHEMA, preserve_index=False
+                    )
+                )
+                if keep_frames:
+                    kept.append(frame)
+    else:
+        with out_path.open("w", newline="") as handle:
+            header = True
+            for frame in frames:
+                frame = _to_schema(frame, orbiting_body)
+                frame.to_csv(handle, index=False, header=header)
+                header = False
+                if keep_frames:
+                    kept.append(frame)
+            if header:
+                pd.DataFrame(columns=SCHEMA_COLUMNS).to_csv(handle, index=False)
+    if not keep_frames:
+        return None
+    if not kept:
+        return _to_schema(pd.DataFrame(), orbiting_body)
+    return pd.concat(kept, ignore_index=True).infer_objects()
+
+
 def ingest(
     start_date: date,
     end_date: date,
@@ -349,27 +496,39 @@ def ingest(
     out_path: Path,
     refresh: bool,
     raw_dir: Path = RAW_DIR,
+    max_workers: int = FETCH_WORKERS,
+    return_frame: bool = True,
 ):
     api_key = os.getenv("NASA_API_KEY")
     if not api_key:
         raise RuntimeError("NASA_API_KEY environment variable not set.")
 
     chunks = list(chunk_date_ranges(start_date, end_date))
-    cache_paths = []
-    with requests.Session() as session:
-        for chunk_start, chunk_end in tqdm(chunks, desc="Fetching chunks"):
-            cache_path = fetch_or_load_chunk(
-                session=session,
-                start_date=chunk_start,
-                end_date=chunk_end,
-                api_key=api_key,
-                raw_dir=raw_dir,
-                refresh=refresh,
+    with build_session(max_workers) as session:
+        def load(chunk):
+            chunk_start, chunk_end = chunk
+            _, payload = _load_chunk(
+                session, chunk_start, chunk_end, api_key, raw_dir, refresh
+            )
+            # The payload validated or fetched here is flattened right away,
+            # so no cache file is parsed a second time and only the compact
+            # frame outlives the worker.
+            return None if payload is None else _payload_frame(payload)
+
+        # Results stay in chunk order and are written as they arrive; only
+        # max_workers chunks are submitted ahead of the writer.
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = tqdm(
+                _map_bounded(executor, load, chunks, max_workers),
+                total=len(chunks),
+                desc="Fetching chunks",
+            )
+            df = _write_frames(
+                (frame for frame in frames if frame is not None),
+                orbiting_body,
+                out_path,
+                keep_frames=return_frame,
             )
-            cache_paths.append(cache_path)
-
-    df = build_dataframe_from_cache(cache_paths, orbiting_body)
-    df.to_csv(out_path, index=False)
     print(f"Full dataset saved to: {out_path}")
     return df
 
@@ -389,15 +548,31 @@ def main():
     )
     parser.add_argument(
         "--out",
-        default="asteroid_data_full.csv",
-        help="Output CSV path.",
+        default="asteroid_data_full.parquet",
+        help="Output path; a .parquet suffix writes parquet, anything else CSV.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["parquet", "csv"],
+        default=None,
+        help="Output format (parquet is zstd-compressed); must match --out.",
     )
     parser.add_argument(
         "--refresh",
         action="store_true",
         help="Re-fetch cached chunks.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=FETCH_WORKERS,
+        help="Number of chunks fetched concurrently.",
+    )
     args = parser.parse_args()
+    try:
+        out_path = check_output_format(Path(args.out), args.format)
+    except ValueError as exc:
+        parser.error(str(exc))
 
     if args.start and args.end:
         start_date = _parse_date(args.start)
@@ -410,8 +585,10 @@ def main():
         start_date=start_date,
         end_date=end_date,
         orbiting_body=args.orbiting_body,
-        out_path=Path(args.out),
+        out_path=out_path,
         refresh=args.refresh,
+        max_workers=args.workers,
+        return_frame=False,
     )
 
 
@@ -1,12 +1,16 @@
 import argparse
+import functools
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 
-from asteroid_analysis.features import enrich
+from asteroid_analysis.features import add_row_features, cap_scatter_points
+from asteroid_analysis.loaders import read_parquet
 
 
 INTERPRETATION_NOTES = """# Interpretation Notes
@@ -20,7 +24,24 @@ INTERPRETATION_NOTES = """# Interpretation Notes
 """
 
 
-def load_processed(data_dir: Path) -> pd.DataFrame:
+# Beyond this many points the HTML scatters are sampled; hazardous approaches
+# are kept first.
+SCATTER_POINT_LIMIT = 50_000
+
+# Approach columns the learning reports use; the rest of the table is skipped.
+APPROACH_COLUMNS = [
+    "id",
+    "close_approach_date",
+    "miss_distance_km",
+    "miss_distance_lunar",
+    "velocity_km_s",
+    "is_potentially_hazardous_asteroid",
+    "is_sentry_object",
+    "orbiting_body",
+]
+
+
+def load_processed(data_dir: Path, orbiting_body: str | None = None) -> pd.DataFrame:
     objects_path = data_dir / "objects.parquet"
     approaches_path = data_dir / "approaches.parquet"
     orbits_path = data_dir / "orbits.parquet"
@@ -30,43 +51,94 @@ def load_processed(data_dir: Path) -> pd.DataFrame:
         raise FileNotFoundError(
             "Missing processed parquet files: "
             f"{missing_list}. Run: python -m asteroid_analysis.build "
-            f"--input asteroid_data_full.csv --outdir {data_dir}"
+            f"--input asteroid_data_full.parquet --outdir {data_dir}"
         )
 
-    objects = pd.read_parquet(objects_path)
-    approaches = pd.read_parquet(approaches_path)
-    merged = approaches.merge(
-        objects[
-            [
-                "id",
-                "name",
-                "nasa_jpl_url",
-                "diameter_mid_m",
-            ]
-        ],
-        on="id",
-        how="left",
+    mtimes = tuple(
+        path.stat().st_mtime_ns if path.exists() else 0
+        for path in [objects_path, approaches_path, orbits_path]
     )
-    if orbits_path.exists():
-        orbits = pd.read_parquet(orbits_path)
-        # Ensure id column types match before merging
-        merged["id"] = merged["id"].astype(str)
-        orbits["id"] = orbits["id"].astype(str)
+    # Shallow copy so callers adding columns never touch the cached frame.
+    return _load_joined(data_dir, orbiting_body, mtimes).copy(deep=False)
+
+
+@functools.lru_cache(maxsize=2)
+def _load_joined(
+    data_dir: Path, orbiting_body: str | None, mtimes: tuple
+) -> pd.DataFrame:
+    # Cached per file mtimes, so repeated loads of unchanged tables in one
+    # process skip the reads and merges.
+    objects_path = data_dir / "objects.parquet"
+    approaches_path = data_dir / "approaches.parquet"
+    orbits_path = data_dir / "orbits.parquet"
+    # The body filter is pushed into the parquet scan so other bodies' row
+    # groups are never decoded.
+    filters = None
+    if orbiting_body is not None:
+        filters = [("orbiting_body", "==", orbiting_body)]
+    # Arrow releases the GIL while decoding, so the tables are read side by
+    # side.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        objects_future = executor.submit(
+            read_parquet,
+            objects_path,
+            columns=["id", "name", "nasa_jpl_url", "diameter_mid_m"],
+        )
+        approaches_future = executor.submit(
+            read_parquet, approaches_path, columns=APPROACH_COLUMNS, filters=filters
+        )
+        orbits_future = None
+        if orbits_path.exists():
+            orbits_future = executor.submit(
+                read_parquet,
+                orbits_path,
+                columns=["id", "orbit_class_name", "minimum_orbit_intersection"],
+            )
+        merged = approaches_future.result().merge(
+            objects_future.result(),
+            on="id",
+            how="left",
+        )
+    if orbits_future is not None:
+        orbits = orbits_future.result()
+        # Orbit ids are stored as strings; cast them to the integer ids so the
+        # join hashes int64 keys instead of every row's id string.
+        orbits = orbits.astype({"id": merged["id"].dtype})
         merged = merged.merge(
-            orbits[["id", "orbit_class_name", "minimum_orbit_intersection"]],
+            orbits,
             on="id",
             how="left",
         )
     return merged
 
 
+def _sampled_title(title: str, total: int) -> str:
+    if total <= SCATTER_POINT_LIMIT:
+        return title
+    return f"{title} ({SCATTER_POINT_LIMIT:,} of {total:,} shown)"
+
+
+def _add_duplicate_note(fig, duplicate_count: int) -> None:
+    if duplicate_count > 0:
+        fig.add_annotation(
+            x=0.01,
+            y=0.01,
+            xref="paper",
+            yref="paper",
+            text=f"Note: {duplicate_count} duplicate approach_id values detected.",
+            showarrow=False,
+            align="left",
+        )
+
+
 def build_learning_reports(
     outdir: Path,
     data_dir: Path,
     orbiting_body: str,
     as_of_date: datetime | None = None,
+    watchlist_top_k: int | None = None,
 ):
-    df = load_processed(data_dir)
+    df = load_processed(data_dir, orbiting_body)
     metadata_path = data_dir / "metadata.json"
     duplicate_count = 0
     if metadata_path.exists():
@@ -75,14 +147,15 @@ def build_learning_reports(
             duplicate_count = int(metadata.get("duplicate_approach_id_count", 0) or 0)
         except json.JSONDecodeError:
             duplicate_count = 0
-    df = df[df["orbiting_body"] == orbiting_body]
     df = df.dropna(subset=["close_approach_date"])
 
     if df.empty:
         print("No data available for learning reports.")
         return
 
-    df = enrich(df)
+    # Only the size bins are read here, so the row features are enough; the
+    # rank columns enrich adds would cost three sorts for nothing.
+    df = add_row_features(df)
     outdir.mkdir(parents=True, exist_ok=True)
 
     if as_of_date is None:
@@ -91,7 +164,7 @@ def build_learning_reports(
     upcoming = df[
         (df["close_approach_date"] >= as_of_date)
         & (df["close_approach_date"] <= window_end)
-    ].sort_values("miss_distance_km")
+    ]
 
     watchlist_columns = [
         "name",
@@ -108,7 +181,14 @@ def build_learning_reports(
     if "minimum_orbit_intersection" in upcoming.columns:
         watchlist_columns.append("minimum_orbit_intersection")
 
-    watchlist = upcoming[watchlist_columns].rename(
+    # Only the watchlist columns are reordered; with a top-k the closest rows
+    # come from a partial selection instead of a full sort.
+    ranked = upcoming[watchlist_columns + ["miss_distance_km"]]
+    if watchlist_top_k is None:
+        ranked = ranked.sort_values("miss_distance_km")
+    else:
+        ranked = ranked.nsmallest(watchlist_top_k, "miss_distance_km")
+    watchlist = ranked[watchlist_columns].rename(
         columns={
             "close_approach_date": "date",
             "is_potentially_hazardous_asteroid": "hazardous",
@@ -122,11 +202,12 @@ def build_learning_reports(
 
     near_miss = df[df["miss_distance_lunar"] <= 5]
     timeline_fig = px.scatter(
-        near_miss,
+        cap_scatter_points(near_miss, SCATTER_POINT_LIMIT),
         x="close_approach_date",
         y="miss_distance_lunar",
         color="is_potentially_hazardous_asteroid",
         symbol="is_sentry_object",
+        render_mode="webgl",
         hover_data={
             "name": True,
             "id": True,
@@ -139,48 +220,56 @@ def build_learning_reports(
         },
     )
     timeline_fig.update_layout(
-        title="Near-miss events (<= 5 LD)",
+        title=_sampled_title("Near-miss events (<= 5 LD)", len(near_miss)),
         xaxis_title="Date",
         yaxis_title="Miss distance (lunar distances)",
         height=450,
         margin=dict(l=40, r=20, t=50, b=40),
     )
-    if duplicate_count > 0:
-        timeline_fig.add_annotation(
-            x=0.01,
-            y=0.01,
-            xref="paper",
-            yref="paper",
-            text=f"Note: {duplicate_count} duplicate approach_id values detected.",
-            showarrow=False,
-            align="left",
-        )
+    _add_duplicate_note(timeline_fig, duplicate_count)
     timeline_fig.write_html(outdir / "near_misses_under_5LD.html")
 
-    hazard_by_approach = (
-        df.groupby("size_bin_m", dropna=False, observed=False)
-        .agg(
-            total=("id", "size"),
-            hazardous=("is_potentially_hazardous_asteroid", "sum"),
-        )
-        .reset_index()
+    # Approach and unique-object counts per size bin from bincounts over the
+    # category codes; the first row of each id stands in for the object and
+    # the extra last slot collects rows without a size bin.
+    bins = df["size_bin_m"]
+    categories = bins.cat.categories
+    codes = bins.cat.codes.to_numpy()
+    slots = np.where(codes < 0, len(categories), codes)
+    first = ~df["id"].duplicated().to_numpy()
+    hazardous = (
+        df["is_potentially_hazardous_asteroid"].fillna(False).to_numpy(dtype=bool)
     )
-    hazard_by_approach["rate"] = (
-        hazard_by_approach["hazardous"] / hazard_by_approach["total"]
+
+    def bin_counts(mask=None):
+        selected = slots if mask is None else slots[mask]
+        return np.bincount(selected, minlength=len(categories) + 1)
+
+    counts = pd.DataFrame(
+        {
+            "size_bin_m": pd.Categorical(list(categories) + [np.nan], dtype=bins.dtype),
+            "total": bin_counts(),
+            "hazardous": bin_counts(hazardous),
+            "objects": bin_counts(first),
+            "hazardous_objects": bin_counts(first & hazardous),
+        }
     )
-    hazard_by_approach["scope"] = "Approaches"
-
-    objects = df.drop_duplicates("id")
-    hazard_by_object = (
-        objects.groupby("size_bin_m", dropna=False, observed=False)
-        .agg(
-            total=("id", "size"),
-            hazardous=("is_potentially_hazardous_asteroid", "sum"),
-        )
-        .reset_index()
+    # Every bin is kept, like groupby(observed=False); the missing-size row
+    # only when some rows have no size bin.
+    if counts["total"].iloc[-1] == 0:
+        counts = counts.iloc[:-1]
+    hazard_by_approach = counts[["size_bin_m", "total", "hazardous"]].assign(
+        rate=counts["hazardous"] / counts["total"], scope="Approaches"
+    )
+    hazard_by_object = pd.DataFrame(
+        {
+            "size_bin_m": counts["size_bin_m"],
+            "total": counts["objects"],
+            "hazardous": counts["hazardous_objects"],
+            "rate": counts["hazardous_objects"] / counts["objects"],
+            "scope": "Unique objects",
+        }
     )
-    hazard_by_object["rate"] = hazard_by_object["hazardous"] / hazard_by_object["total"]
-    hazard_by_object["scope"] = "Unique objects"
 
     hazard_bins = pd.concat([hazard_by_approach, hazard_by_object], ignore_index=True)
     hazard_fig = px.bar(
@@ -196,16 +285,7 @@ def build_learning_reports(
         height=400,
         margin=dict(l=40, r=20, t=50, b=40),
     )
-    if duplicate_count > 0:
-        hazard_fig.add_annotation(
-            x=0.01,
-            y=0.01,
-            xref="paper",
-            yref="paper",
-            text=f"Note: {duplicate_count} duplicate approach_id values detected.",
-            showarrow=False,
-            align="left",
-        )
+    _add_duplicate_note(hazard_fig, duplicate_count)
     hazard_fig.write_html(outdir / "hazard_vs_size_bins.html")
 
     if "minimum_orbit_intersection" in df.columns:
@@ -213,10 +293,11 @@ def build_learning_reports(
             subset=["minimum_orbit_intersection", "miss_distance_km"]
         )
         moid_fig = px.scatter(
-            moid_df,
+            cap_scatter_points(moid_df, SCATTER_POINT_LIMIT),
             x="minimum_orbit_intersection",
             y="miss_distance_km",
             color="is_potentially_hazardous_asteroid",
+            render_mode="webgl",
             hover_data={
                 "name": True,
                 "id": True,
@@ -227,22 +308,13 @@ def build_learning_reports(
             },
         )
         moid_fig.update_layout(
-            title="MOID vs close-approach distance",
+            title=_sampled_title("MOID vs close-approach distance", len(moid_df)),
             xaxis_title="Minimum orbit intersection (AU)",
             yaxis_title="Miss distance (km)",
             height=450,
             margin=dict(l=40, r=20, t=50, b=40),
         )
-        if duplicate_count > 0:
-            moid_fig.add_annotation(
-                x=0.01,
-                y=0.01,
-                xref="paper",
-                yref="paper",
-                text=f"Note: {duplicate_count} duplicate approach_id values detected.",
-                showarrow=False,
-                align="left",
-            )
+        _add_duplicate_note(moid_fig, duplicate_count)
         moid_fig.write_html(outdir / "moid_vs_miss_distance.html")
 
     notes_path = outdir / "interpretation_notes.md"
@@ -268,12 +340,19 @@ def main():
         default="Earth",
         help="Orbiting body filter.",
     )
+    parser.add_argument(
+        "--watchlist-top-k",
+        type=int,
+        default=None,
+        help="Keep only the closest N approaches in the watchlist.",
+    )
     args = parser.parse_args()
 
     build_learning_reports(
         outdir=Path(args.outdir),
         data_dir=Path(args.data_dir),
         orbiting_body=args.orbiting_body,
+        watchlist_top_k=args.watchlist_top_k,
     )
 
 
@@ -0,0 +1,135 @@
+import functools
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+CSV_COLUMN_TYPES = {
+    "date": pa.string(),
+    "id": pa.string(),
+    "neo_reference_id": pa.string(),
+    "name": pa.string(),
+    "nasa_jpl_url": pa.string(),
+    "absolute_magnitude_h": pa.float64(),
+    "is_potentially_hazardous_asteroid": pa.bool_(),
+    "is_sentry_object": pa.bool_(),
+    "diameter_km_min": pa.float64(),
+    "diameter_km_max": pa.float64(),
+    "diameter_m_min": pa.float64(),
+    "diameter_m_max": pa.float64(),
+    "close_approach_date": pa.string(),
+    "close_approach_date_full": pa.string(),
+    "epoch_date_close_approach": pa.float64(),
+    "velocity_km_s": pa.float64(),
+    "velocity_km_h": pa.float64(),
+    "velocity_mph": pa.float64(),
+    "miss_distance_astronomical": pa.float64(),
+    "miss_distance_lunar": pa.float64(),
+    "miss_distance_km": pa.float64(),
+    "miss_distance_miles": pa.float64(),
+    "orbiting_body": pa.string(),
+}
+
+# Low-cardinality string columns loaded as pandas categoricals.
+CATEGORY_COLUMNS = ["name", "orbiting_body"]
+BOOL_COLUMNS = ["is_potentially_hazardous_asteroid", "is_sentry_object"]
+
+
+def _to_frame(table: pa.Table) -> pd.DataFrame:
+    for col in BOOL_COLUMNS:
+        if col in table.column_names:
+            index = table.column_names.index(col)
+            table = table.set_column(index, col, table[col].fill_null(False))
+    return table.to_pandas()
+
+
+def read_asteroid_csv(
+    path: Path,
+    columns: list[str] | None = None,
+    date_columns: list[str] | None = None,
+    filters: dict[str, object] | None = None,
+) -> pd.DataFrame:
+    # Only the requested columns are parsed, with declared types, and equality
+    # filters are applied on the Arrow table before anything reaches pandas.
+    date_columns = date_columns or []
+    filters = filters or {}
+    read_columns = None
+    if columns is not None:
+        read_columns = list(columns) + [col for col in filters if col not in columns]
+
+    column_types = dict(CSV_COLUMN_TYPES)
+    for col in CATEGORY_COLUMNS:
+        column_types[col] = pa.dictionary(pa.int32(), pa.string())
+    for col in date_columns:
+        column_types[col] = pa.timestamp("ns")
+    if read_columns is not None:
+        column_types = {
+            col: dtype for col, dtype in column_types.items() if col in read_columns
+        }
+
+    table = pv.read_csv(
+        path,
+        convert_options=pv.ConvertOptions(
+            column_types=column_types,
+            include_columns=read_columns,
+        ),
+    )
+    for col, value in filters.items():
+        table = table.filter(pc.equal(table[col], value))
+    if columns is not None:
+        table = table.select(columns)
+    return _to_frame(table)
+
+
+def read_parquet(
+    path: Path,
+    columns: list[str] | None = None,
+    filters: list[tuple] | None = None,
+) -> pd.DataFrame:
+    # Arrow's reader directly, converting one column block at a time and
+    # releasing each Arrow buffer as it goes, so peak memory stays near a
+    # single copy of the table.
+    table = pq.read_table(
+        path, columns=columns, filters=filters, use_threads=True, pre_buffer=True
+    )
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def parquet_sibling(path: Path) -> Path:
+    return path.with_suffix(".parquet")
+
+
+def read_asteroid_data(
+    path: Path,
+    columns: list[str] | None = None,
+    date_columns: list[str] | None = None,
+    filters: dict[str, object] | None = None,
+) -> pd.DataFrame:
+    # Prefer the columnar copy written next to the CSV unless the CSV is newer.
+    parquet_path = parquet_sibling(path)
+    if not parquet_path.exists() or (
+        path.exists() and path.stat().st_mtime > parquet_path.stat().st_mtime
+    ):
+        return read_asteroid_csv(path, columns, date_columns, filters)
+
+    predicates = [(col, "==", value) for col, value in (filters or {}).items()]
+    table = pq.read_table(
+        parquet_path,
+        columns=columns,
+        filters=predicates or None,
+        read_dictionary=CATEGORY_COLUMNS,
+    )
+    df = _to_frame(table)
+    for col in date_columns or []:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+@functools.lru_cache(maxsize=1)
+def load_clean(path: Path) -> pd.DataFrame:
+    # One fully typed frame shared by scripts run in the same session; callers
+    # must treat it as read-only.
+    return read_asteroid_data(path, date_columns=["close_approach_date"])
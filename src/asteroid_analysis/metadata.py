@@ -2,6 +2,7 @@ from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import json
 import hashlib
@@ -38,7 +39,14 @@ def build_metadata(
 ) -> RunMetadata:
     date_min = df["close_approach_date"].min()
     date_max = df["close_approach_date"].max()
-    objects = df.drop_duplicates("id")
+    # One duplicated() pass marks each object's first row; the object counts
+    # are taken from that mask without building an objects frame.
+    ids = df["id"]
+    first = ~ids.duplicated().to_numpy()
+    hazardous = (
+        df["is_potentially_hazardous_asteroid"].fillna(False).to_numpy(dtype=bool)
+    )
+    sentry = df["is_sentry_object"].fillna(False).to_numpy(dtype=bool)
     notes = "each row is one close-approach event; object may appear multiple times"
 
     return RunMetadata(
@@ -49,10 +57,11 @@ def build_metadata(
         date_min=str(date_min) if pd.notna(date_min) else "",
         date_max=str(date_max) if pd.notna(date_max) else "",
         total_approaches=int(len(df)),
-        unique_objects=int(df["id"].nunique()),
-        hazardous_objects=int(objects["is_potentially_hazardous_asteroid"].sum()),
-        hazardous_approaches=int(df["is_potentially_hazardous_asteroid"].sum()),
-        sentry_objects=int(objects["is_sentry_object"].sum()),
+        # nunique() leaves out a missing id, which duplicated() keeps once.
+        unique_objects=int(np.count_nonzero(first)) - int(ids.isna().any()),
+        hazardous_objects=int(np.count_nonzero(hazardous & first)),
+        hazardous_approaches=int(np.count_nonzero(hazardous)),
+        sentry_objects=int(np.count_nonzero(sentry & first)),
         duplicate_approach_id_count=duplicate_approach_id_count,
         orbiting_body_filter=orbiting_body_filter,
         notes=notes,
@@ -67,8 +76,6 @@ def write_metadata(metadata: RunMetadata, output_path: Path) -> None:
 def _hash_file(path: Path) -> str:
     if not path.exists():
         return ""
-    digest = hashlib.sha256()
+    # file_digest runs the read-and-update loop in C.
     with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            digest.update(chunk)
-    return digest.hexdigest()
+        return hashlib.file_digest(handle, "sha256").hexdigest()
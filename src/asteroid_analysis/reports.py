@@ -9,45 +9,38 @@ import matplotlib
 
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
-from asteroid_analysis.features import enrich
+from asteroid_analysis.loaders import read_parquet
 
 
 DEFAULT_DATA_DIR = Path("data/processed")
 
 
-def load_joined(data_dir: Path) -> pd.DataFrame:
-    objects_path = data_dir / "objects.parquet"
+# The reports read only dates, distances and the hazard flag; the body filter
+# runs in the scan, so the rest of approaches.parquet is never decoded.
+APPROACH_COLUMNS = [
+    "close_approach_date",
+    "miss_distance_km",
+    "is_potentially_hazardous_asteroid",
+]
+
+
+def load_joined(data_dir: Path, orbiting_body: str | None = None) -> pd.DataFrame:
     approaches_path = data_dir / "approaches.parquet"
-    missing = [path for path in [objects_path, approaches_path] if not path.exists()]
-    if missing:
-        missing_list = ", ".join(str(path) for path in missing)
+    if not approaches_path.exists():
         raise FileNotFoundError(
             "Missing processed parquet files: "
-            f"{missing_list}. Run: python -m asteroid_analysis.build "
-            f"--input asteroid_data_full.csv --outdir {data_dir}"
+            f"{approaches_path}. Run: python -m asteroid_analysis.build "
+            f"--input asteroid_data_full.parquet --outdir {data_dir}"
         )
 
-    objects = pd.read_parquet(objects_path)
-    approaches = pd.read_parquet(approaches_path)
-
-    # Only merge columns from objects that are not already in approaches
-    # Both dataframes have 'id', 'is_potentially_hazardous_asteroid', 'is_sentry_object'
-    # So we only need to merge 'diameter_mid_km' and 'diameter_mid_m' from objects
-    merged = approaches.merge(
-        objects[
-            [
-                "id",
-                "diameter_mid_km",
-                "diameter_mid_m",
-            ]
-        ],
-        on="id",
-        how="left",
-    )
-    return merged
+    filters = None
+    if orbiting_body is not None:
+        filters = [("orbiting_body", "==", orbiting_body)]
+    return read_parquet(approaches_path, columns=APPROACH_COLUMNS, filters=filters)
 
 
 def load_metadata(data_dir: Path) -> dict:
@@ -61,11 +54,17 @@ def load_metadata(data_dir: Path) -> dict:
 
 
 def compute_monthly_quantiles(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["month"] = df["close_approach_date"].dt.to_period("M").dt.to_timestamp()
+    # The month key is a standalone array, so the input frame is neither
+    # copied nor modified.
+    dates = df["close_approach_date"].to_numpy()
+    month = pd.Series(
+        dates.astype("datetime64[M]").astype(dates.dtype), index=df.index, name="month"
+    )
 
     grouped = (
-        df.groupby(["month", "is_potentially_hazardous_asteroid"])["miss_distance_km"]
+        df.groupby([month, df["is_potentially_hazardous_asteroid"]])[
+            "miss_distance_km"
+        ]
         .quantile([0.1, 0.5, 0.9])
         .unstack(level=-1)
         .reset_index()
@@ -81,10 +80,11 @@ def compute_monthly_quantiles(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def compute_ecdf(series: pd.Series) -> pd.DataFrame:
-    values = series.dropna().sort_values().reset_index(drop=True)
-    if values.empty:
-        return pd.DataFrame({"x": [], "y": []})
-    y = (values.index + 1) / len(values)
+    # Sorted in place on one float array; y is the rank over the count.
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    values = values[~np.isnan(values)]
+    values.sort()
+    y = np.arange(1, values.size + 1) / max(values.size, 1)
     return pd.DataFrame({"x": values, "y": y})
 
 
@@ -264,20 +264,23 @@ def plot_ecdf_html(
 
 
 def plot_weekly_heatmap_html(df: pd.DataFrame, output_path: Path) -> None:
+    # Observed ISO years/weeks index the (year x week) grid directly, and one
+    # bincount fills every cell, empty ones included.
     iso = df["close_approach_date"].dt.isocalendar()
-    weekly_counts = (
-        df.assign(year=iso.year, week=iso.week)
-        .groupby(["year", "week"])
-        .size()
-        .reset_index(name="count")
+    years, year_idx = np.unique(
+        iso["year"].to_numpy(dtype=np.int64), return_inverse=True
     )
-
-    pivot = weekly_counts.pivot(index="year", columns="week", values="count").fillna(0)
+    weeks, week_idx = np.unique(
+        iso["week"].to_numpy(dtype=np.int64), return_inverse=True
+    )
+    grid = np.bincount(
+        year_idx * len(weeks) + week_idx, minlength=len(years) * len(weeks)
+    ).reshape(len(years), len(weeks))
     fig = go.Figure(
         data=go.Heatmap(
-            z=pivot.values,
-            x=pivot.columns,
-            y=pivot.index.astype(str),
+            z=grid,
+            x=weeks,
+            y=years.astype(str),
             colorscale="Blues",
             colorbar_title="Approaches",
         )
@@ -293,12 +296,12 @@ def plot_weekly_heatmap_html(df: pd.DataFrame, output_path: Path) -> None:
 
 
 def build_reports(outdir: Path, orbiting_body: str, data_dir: Path = DEFAULT_DATA_DIR) -> None:
-    df = load_joined(data_dir)
+    df = load_joined(data_dir, orbiting_body)
     metadata = load_metadata(data_dir)
     duplicate_count = int(metadata.get("duplicate_approach_id_count", 0) or 0)
-    df = df[df["orbiting_body"] == orbiting_body]
+    # The quantile, ECDF and heatmap outputs read only dates, distances and the
+    # hazard flag, so the frame is not enriched; the learning reports do that.
     df = df.dropna(subset=["close_approach_date", "miss_distance_km"])
-    df = enrich(df)
     if df.empty:
         print(
             "No data available after filtering. "
@@ -0,0 +1,19 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from asteroid_analysis import build
+
+FIXTURE_PATH = Path("tests/fixtures/asteroid_data_sample.csv")
+
+
+@pytest.fixture(scope="session")
+def processed_tables(tmp_path_factory):
+    # Built once per run; tests that add or change tables work on a copy.
+    root = tmp_path_factory.mktemp("sample")
+    input_path = root / "asteroid_data_sample.csv"
+    shutil.copyfile(FIXTURE_PATH, input_path)
+    outdir = root / "processed"
+    build.build_tables(input_path, outdir)
+    return input_path, outdir
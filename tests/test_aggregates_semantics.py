@@ -24,6 +24,7 @@ def test_aggregates_bins_and_types():
     hazard_bins = aggregates[aggregates["aggregate_type"] == "hazard_rate_size"]
     assert "size_bin_m" in hazard_bins.columns
     assert hazard_bins["size_bin_m"].notna().any()
+    assert (hazard_bins["total"] > 0).all()
 
 
 def test_hazard_rate_by_size_bin_matches_expected():
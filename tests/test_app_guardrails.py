@@ -1,3 +1,5 @@
+import os
+from datetime import date
 from pathlib import Path
 
 import pandas as pd
@@ -43,3 +45,236 @@ def test_get_data_mtimes_updates(tmp_path):
     second_mtimes = app.get_data_mtimes(data_dir)
 
     assert second_mtimes[0] >= first_mtimes[0]
+
+
+def test_load_dataframes_pushes_down_filters(tmp_path):
+    from asteroid_analysis.build import build_tables
+
+    fixture = Path(__file__).parent / "fixtures" / "asteroid_data_sample.csv"
+    data_dir = tmp_path / "processed"
+    build_tables(fixture, data_dir)
+
+    _, _, merged, _, _ = app.load_dataframes(data_dir)
+    filters = app.AppFilters(
+        orbiting_body="Earth",
+        hazard="Hazardous only",
+        diam_range=(0.05, 0.5),
+    )
+    _, _, filtered, _, _ = app.load_dataframes(data_dir, filters)
+
+    expected = merged[
+        (merged["orbiting_body"] == "Earth")
+        & merged["is_potentially_hazardous_asteroid"]
+        & merged["diameter_mid_km"].between(0.05, 0.5)
+    ]
+    assert sorted(filtered["id"]) == sorted(expected["id"])
+    assert not filtered.empty
+    pre_joined = app.load_merged(data_dir, filters)
+    assert sorted(pre_joined["id"]) == sorted(expected["id"])
+    assert "approach_id" not in pre_joined.columns
+
+    # A stale merged.parquet falls back to joining the individual tables.
+    merged_path = data_dir / "merged.parquet"
+    os.utime(merged_path, (0, 0))
+    joined = app.load_merged(data_dir, filters)
+    assert sorted(joined["id"]) == sorted(expected["id"])
+    assert joined["is_sentry_object"].dtype == bool
+    assert isinstance(joined["orbiting_body"].dtype, pd.CategoricalDtype)
+
+    summary = app.summarize_dataframes(data_dir)
+    assert summary["pre_counts"]["total_approaches"] == len(merged)
+    assert summary["orbiting_options"] == sorted(merged["orbiting_body"].unique())
+
+
+def test_date_range_filter_includes_end_day(tmp_path):
+    data_dir = tmp_path / "processed"
+    data_dir.mkdir()
+    objects = pd.DataFrame({"id": [1, 2, 3]}).reindex(
+        columns=app.REQUIRED_OBJECT_COLUMNS
+    )
+    approaches = pd.DataFrame(
+        {
+            "id": [1, 2, 3],
+            "close_approach_date": pd.to_datetime(
+                ["2029-04-12 00:00", "2029-04-13 18:30", "2029-04-14 00:00"]
+            ),
+        }
+    )
+    objects.to_parquet(data_dir / "objects.parquet", index=False)
+    approaches.to_parquet(data_dir / "approaches.parquet", index=False)
+
+    filters = app.AppFilters(date_range=(date(2029, 4, 13), date(2029, 4, 13)))
+    _, _, merged, _, _ = app.load_dataframes(data_dir, filters)
+
+    assert merged["id"].tolist() == [2]
+
+
+def test_rank_approaches_orders_rows():
+    df = pd.DataFrame(
+        {
+            "miss_distance_km": [3.0, 1.0, 2.0],
+            "nasa_jpl_url": ["http://a", None, "http://c"],
+        }
+    )
+
+    ranked = app.rank_approaches(df, "closest miss_distance_km")
+
+    assert ranked["miss_distance_km"].tolist() == [1.0, 2.0, 3.0]
+    assert ranked["nasa_jpl_url"].iloc[1] == "http://c"
+
+
+def test_monthly_counts_fills_empty_months():
+    df = pd.DataFrame(
+        {
+            "close_approach_date": pd.to_datetime(
+                ["2029-01-05", "2029-01-20", "2029-04-01"]
+            )
+        }
+    )
+
+    monthly = app.monthly_counts(df)
+
+    assert monthly["count"].tolist() == [2, 0, 0, 1]
+    assert monthly["close_approach_date"].iloc[0] == pd.Timestamp("2029-01-01")
+
+
+def test_apophis_mask_matches_names_and_ids():
+    df = pd.DataFrame(
+        {
+            "id": [2099942, 1001, 1002, 99942],
+            "name": ["99942 Apophis (2004 MN4)", "Test A", None, "Renamed"],
+        }
+    )
+    expected = [True, False, False, True]
+
+    assert app.apophis_mask(df).tolist() == expected
+    df["name"] = df["name"].astype("category")
+    assert app.apophis_mask(df).tolist() == expected
+    df["id"] = df["id"].astype(str)
+    assert app.apophis_mask(df).tolist() == expected
+
+
+def test_top_k_matches_nsmallest_and_nlargest():
+    df = pd.DataFrame({"value": [3.0, None, 1.0, 3.0, 2.0, 1.0, None, 5.0]})
+
+    for k in [0, 1, 2, 3, 7, 20]:
+        assert app.top_k(df, "value", k).index.equals(df.nsmallest(k, "value").index)
+        assert app.top_k(df, "value", k, largest=True).index.equals(
+            df.nlargest(k, "value").index
+        )
+
+
+def test_monthly_grid_spans_years():
+    df = pd.DataFrame(
+        {
+            "close_approach_date": pd.to_datetime(
+                ["2028-11-02", "2028-11-20", "2029-02-14", None]
+            )
+        }
+    )
+
+    grid, months, years = app.monthly_grid(df)
+
+    assert months.tolist() == [1, 2, 11, 12]
+    assert years.tolist() == [2028, 2029]
+    assert grid.tolist() == [[0, 0, 2, 0], [0, 1, 0, 0]]
+
+
+def test_stats_range_folds_row_groups(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "values.parquet"
+    table = pa.table(
+        {
+            "value": [5.0, None, 2.0, 9.0, float("nan")],
+            "empty": pa.array([None] * 5, type=pa.float64()),
+        }
+    )
+    pq.write_table(table, path, row_group_size=2)
+
+    assert app._stats_range(path, "value") == (2.0, 9.0)
+    assert app._stats_range(path, "empty") is None
+
+
+def test_approach_counts_object_and_approach_level():
+    df = pd.DataFrame(
+        {
+            "id": [1, 1, 2, 3],
+            "is_potentially_hazardous_asteroid": [True, True, False, True],
+            "is_sentry_object": [False, False, True, False],
+        }
+    )
+
+    counts = app.approach_counts(df)
+
+    assert counts == {
+        "total_approaches": 4,
+        "unique_objects": 3,
+        "hazardous_objects": 2,
+        "hazardous_approaches": 3,
+        "sentry_objects": 1,
+        "sentry_approaches": 1,
+    }
+
+
+def test_hazard_rate_by_size_counts_observed_and_missing_bins():
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4, 5],
+            "size_bin_m": pd.Categorical(
+                ["<50m", "<50m", None, ">1km", None],
+                categories=["<50m", "50-140m", ">1km"],
+                ordered=True,
+            ),
+            "is_potentially_hazardous_asteroid": [True, False, True, True, False],
+        }
+    )
+
+    rates = app.hazard_rate_by_size(df)
+
+    assert rates["size_bin_m"].tolist()[:2] == ["<50m", ">1km"]
+    assert pd.isna(rates["size_bin_m"].iloc[2])
+    assert rates["total"].tolist() == [2, 1, 2]
+    assert rates["hazardous"].tolist() == [1, 1, 1]
+    assert rates["hazard_rate"].tolist() == [0.5, 1.0, 0.5]
+
+
+def test_cap_scatter_points_keeps_hazardous_rows():
+    df = pd.DataFrame(
+        {
+            "id": range(10),
+            "is_potentially_hazardous_asteroid": [i % 4 == 0 for i in range(10)],
+        }
+    )
+
+    capped = app.cap_scatter_points(df, 5)
+
+    assert len(capped) == 5
+    hazardous_ids = set(df.loc[df["is_potentially_hazardous_asteroid"], "id"])
+    assert hazardous_ids <= set(capped["id"])
+    assert capped.index.is_monotonic_increasing
+    assert len(app.cap_scatter_points(df, 2)) == 2
+    assert app.cap_scatter_points(df, 10) is df
+
+
+def test_load_dataframes_joins_string_orbit_ids(tmp_path):
+    from asteroid_analysis.build import build_tables
+
+    fixture = Path(__file__).parent / "fixtures" / "asteroid_data_sample.csv"
+    data_dir = tmp_path / "processed"
+    build_tables(fixture, data_dir)
+    orbits = pd.DataFrame(
+        {
+            "id": ["1001"],
+            "orbit_class_name": ["Apollo"],
+            "minimum_orbit_intersection": [0.01],
+        }
+    )
+    orbits.to_parquet(data_dir / "orbits.parquet", index=False)
+
+    _, _, merged, _, _ = app.load_dataframes(data_dir)
+
+    classes = merged.loc[merged["id"] == 1001, "orbit_class_name"]
+    assert not classes.empty
+    assert (classes == "Apollo").all()
@@ -77,6 +77,7 @@ def test_derived_columns_safe_on_zeros():
     assert "log_diameter_mid_km" in objects.columns
     assert pd.isna(approaches.loc[0, "log_miss_distance_km"])
     assert pd.isna(objects.loc[0, "log_diameter_mid_km"])
+    assert approaches["log_miss_distance_km"].dtype == "float64"
 
 
 def test_missing_epoch_generates_unique_ids():
@@ -143,3 +144,60 @@ def test_exact_duplicate_rows_dropped():
     df = pd.concat([df, df.iloc[[0]]], ignore_index=True)
     _, approaches = build.process_dataframe(df)
     assert approaches["approach_id"].is_unique
+
+
+def test_merged_table_joins_objects_and_orbits(tmp_path):
+    objects, approaches = build.process_dataframe(_sample_df())
+    objects.to_parquet(tmp_path / "objects.parquet", index=False)
+    approaches.to_parquet(tmp_path / "approaches.parquet", index=False)
+    pd.DataFrame({"id": ["1001"], "orbit_class_name": ["Apollo"]}).to_parquet(
+        tmp_path / "orbits.parquet", index=False
+    )
+
+    merged = pd.read_parquet(build.write_merged_table(tmp_path))
+
+    assert len(merged) == len(approaches)
+    assert set(merged["name"].dropna()) == {"Test A"}
+    assert merged["orbit_class_name"].tolist() == ["Apollo"] * len(approaches)
+    assert isinstance(merged["orbiting_body"].dtype, pd.CategoricalDtype)
+    assert merged["size_bin_m"].dtype.ordered
+    assert merged["energy_proxy"].notna().any()
+
+
+def test_flag_columns_accept_strings_and_blanks():
+    df = _sample_df()
+    df["is_potentially_hazardous_asteroid"] = ["True", None]
+    df["is_sentry_object"] = [None, "False"]
+    _, approaches = build.process_dataframe(df)
+    assert approaches["is_potentially_hazardous_asteroid"].tolist() == [True, False]
+    assert approaches["is_sentry_object"].dtype == bool
+    assert not approaches["is_sentry_object"].any()
+
+
+def test_top_positions_match_nsmallest():
+    values = pd.Series([3.0, 1.0, 3.0, 2.0, 1.0, 5.0, 3.0])
+
+    for k in [1, 2, 3, 4, 7, 10]:
+        positions = build._top_positions(values.to_numpy(), k)
+        assert positions.tolist() == values.nsmallest(k).index.tolist()
+
+
+def test_top_n_pads_with_missing_metric_rows():
+    enriched = pd.DataFrame(
+        {
+            "id": ["a", "b", "c"],
+            "name": ["A", "B", "C"],
+            "close_approach_date": pd.to_datetime(["2020-01-01"] * 3),
+            "miss_distance_km": [2.0, 1.0, 3.0],
+            "velocity_km_s": [5.0, 6.0, 7.0],
+            "diameter_mid_km": [None, 0.5, None],
+            "energy_proxy": [1.0, 2.0, 3.0],
+            "orbiting_body": pd.Categorical(["Earth"] * 3),
+        }
+    )
+
+    top = build._top_n_aggregates(enriched)
+    largest = top[top["metric"] == "largest"]
+
+    # Like sort_values().head(), NaN rows follow the valued ones in order.
+    assert largest["id"].tolist() == ["b", "a", "c"]
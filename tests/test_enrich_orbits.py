@@ -51,9 +51,58 @@ def test_orbit_schema_and_missing_fields(tmp_path):
     }
     cache_path.write_text(json.dumps(payload))
 
-    df = pd.DataFrame([enrich_orbits.extract_orbit_fields(payload)])
-    assert list(df.columns) == enrich_orbits.ORBIT_COLUMNS
-
     missing_payload = {"id": "1000"}
-    df_missing = pd.DataFrame([enrich_orbits.extract_orbit_fields(missing_payload)])
-    assert list(df_missing.columns) == enrich_orbits.ORBIT_COLUMNS
+    frame = enrich_orbits.orbits_frame([payload, missing_payload])
+    assert list(frame.columns) == enrich_orbits.ORBIT_COLUMNS
+    assert frame["orbit_class_name"].tolist()[0] == "Apollo"
+    assert frame["id"].tolist() == ["999", "1000"]
+    assert frame["orbit_id"].isna().tolist() == [False, True]
+
+
+def test_build_orbits_keeps_id_order_with_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("NASA_API_KEY", "demo")
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    ids = [str(neo_id) for neo_id in range(100, 120)]
+    for neo_id in ids:
+        eccentricity = "n/a" if neo_id == ids[-1] else "0.5"
+        payload = {"id": neo_id, "orbital_data": {"eccentricity": eccentricity}}
+        (raw_dir / f"neo_{neo_id}.json").write_text(json.dumps(payload))
+    objects_path = tmp_path / "objects.parquet"
+    pd.DataFrame({"id": ids}).to_parquet(objects_path, index=False)
+
+    df = enrich_orbits.build_orbits(
+        out_path=tmp_path / "out" / "orbits.parquet",
+        objects_path=objects_path,
+        raw_dir=raw_dir,
+        max_workers=4,
+    )
+
+    assert df["id"].tolist() == ids
+    assert (df["eccentricity"].iloc[:-1] == 0.5).all()
+    assert pd.isna(df["eccentricity"].iloc[-1])
+    assert df["eccentricity"].dtype == "float32"
+
+
+def test_build_orbits_reuses_previous_table(tmp_path, monkeypatch):
+    monkeypatch.setenv("NASA_API_KEY", "demo")
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    for neo_id in ["1", "2"]:
+        payload = {"id": neo_id, "orbital_data": {"orbit_class": {}}}
+        (raw_dir / f"neo_{neo_id}.json").write_text(json.dumps(payload))
+    objects_path = tmp_path / "objects.parquet"
+    out_path = tmp_path / "orbits.parquet"
+    pd.DataFrame({"id": ["1"]}).to_parquet(objects_path, index=False)
+    enrich_orbits.build_orbits(out_path, objects_path=objects_path, raw_dir=raw_dir)
+
+    # Reused rows no longer need their raw file; new ids still read theirs.
+    (raw_dir / "neo_1.json").unlink()
+    pd.DataFrame({"id": ["1", "2"]}).to_parquet(objects_path, index=False)
+    df = enrich_orbits.build_orbits(
+        out_path, objects_path=objects_path, raw_dir=raw_dir
+    )
+
+    assert sorted(df["id"]) == ["1", "2"]
+    assert isinstance(df["orbit_class_name"].dtype, pd.CategoricalDtype)
+    assert sorted(pd.read_parquet(out_path)["id"]) == ["1", "2"]
@@ -1,5 +1,6 @@
 import pandas as pd
 
+from asteroid_analysis import features
 from asteroid_analysis.features import enrich
 
 
@@ -14,19 +15,27 @@ def test_bin_edges_and_labels():
     )
     enriched = enrich(df)
 
-    assert enriched["miss_ld_bin"].tolist() == ["<1", "1-5", "5-20", "20-50", ">50", ">50"]
-    assert enriched["size_bin_m"].tolist() == [
-        "<50m",
-        "50-140m",
-        "140-500m",
-        "500m-1km",
-        ">1km",
-        ">1km",
-    ]
-    assert enriched["velocity_bin_kms"].tolist() == ["<10", "10-20", "20-30", ">30", ">30", ">30"]
-    assert str(enriched["size_bin_m"].dtype) == "category"
-    assert str(enriched["miss_ld_bin"].dtype) == "category"
-    assert str(enriched["velocity_bin_kms"].dtype) == "category"
+    expected = {
+        "miss_ld_bin": (
+            ["<1", "1-5", "5-20", "20-50", ">50", ">50"],
+            features.MISS_LD_LABELS,
+        ),
+        "size_bin_m": (
+            ["<50m", "50-140m", "140-500m", "500m-1km", ">1km", ">1km"],
+            features.SIZE_LABELS_M,
+        ),
+        "velocity_bin_kms": (
+            ["<10", "10-20", "20-30", ">30", ">30", ">30"],
+            features.VELOCITY_LABELS_KMS,
+        ),
+    }
+    for column, (values, labels) in expected.items():
+        pd.testing.assert_series_equal(
+            enriched[column],
+            pd.Series(
+                pd.Categorical(values, categories=labels, ordered=True), name=column
+            ),
+        )
 
 
 def test_energy_proxy_non_negative():
@@ -40,3 +49,48 @@ def test_energy_proxy_non_negative():
     )
     enriched = enrich(df)
     assert enriched["energy_proxy"].iloc[0] >= 0
+
+
+def test_enrich_leaves_input_untouched():
+    df = pd.DataFrame(
+        {
+            "miss_distance_lunar": [1.0, 30.0],
+            "diameter_mid_m": [100.0, 20.0],
+            "velocity_km_s": [12.0, 25.0],
+            "miss_distance_km": [1000.0, 5000.0],
+            "orbiting_body": ["Earth", "Mars"],
+        }
+    )
+    before = df.copy()
+
+    enriched = enrich(df)
+
+    pd.testing.assert_frame_equal(df, before)
+    assert isinstance(enriched["orbiting_body"].dtype, pd.CategoricalDtype)
+    assert enriched["size_bin_m"].dtype.ordered
+
+
+def test_normalize_rank_matches_average_rank():
+    from asteroid_analysis.features import _normalize_rank
+
+    series = pd.Series([3.0, 1.0, None, 3.0, 2.0, 1.0, 5.0])
+    ranks = series.rank(method="average")
+    expected = (ranks - ranks.min()) / (ranks.max() - ranks.min())
+
+    normalized = _normalize_rank(series, ascending=True)
+    pd.testing.assert_series_equal(normalized, expected)
+    flat = _normalize_rank(pd.Series([4.0, 4.0, None]), ascending=True)
+    assert flat.tolist()[:2] == [0.0, 0.0]
+
+
+def test_cut_matches_pd_cut():
+    series = pd.Series([-float("inf"), 0.5, 1.0, 5.0, None, 50.0, float("inf")])
+    expected = pd.cut(
+        series,
+        bins=features.MISS_LD_BINS,
+        labels=features.MISS_LD_LABELS,
+        right=False,
+    )
+
+    binned = pd.Series(features._cut(series, "miss_ld_bin"))
+    pd.testing.assert_series_equal(binned, expected)
@@ -1,6 +1,8 @@
 from datetime import date
 import json
 
+import pytest
+
 from asteroid_analysis import ingest
 
 
@@ -102,13 +104,33 @@ def test_schema_columns_present(tmp_path):
 
     df = ingest.build_dataframe_from_cache([cache_path], "Earth")
     assert list(df.columns) == ingest.SCHEMA_COLUMNS
-
-
-def test_corrupt_cache_refetch_and_log(tmp_path):
+    row = df.iloc[0]
+    assert row["id"] == "1"
+    assert row["date"] == "2024-01-01"
+    assert row["diameter_m_max"] == 200.0
+    assert row["velocity_km_s"] == 12.3
+    assert row["miss_distance_km"] == 1500000
+    assert bool(row["is_potentially_hazardous_asteroid"]) is True
+
+
+@pytest.mark.parametrize(
+    ("cache_text", "expected_calls", "logs_failure"),
+    [
+        (json.dumps({"near_earth_objects": {}}), 0, False),
+        ("{bad json", 1, True),
+        (json.dumps({"foo": "bar"}), 1, True),
+        (None, 1, False),
+    ],
+    ids=["good", "corrupt", "invalid_schema", "missing"],
+)
+def test_cache_state_decides_refetch(
+    tmp_path, cache_text, expected_calls, logs_failure
+):
     raw_dir = tmp_path / "raw"
     raw_dir.mkdir()
     cache_path = raw_dir / "feed_2024-01-01_2024-01-07.json"
-    cache_path.write_text("{bad json")
+    if cache_text is not None:
+        cache_path.write_text(cache_text)
 
     calls = {"count": 0}
 
@@ -126,64 +148,9 @@ def test_corrupt_cache_refetch_and_log(tmp_path):
         fetcher=fake_fetcher,
     )
 
-    assert calls["count"] == 1
-    assert result == cache_path
-    failures_path = raw_dir / "failures.csv"
-    assert failures_path.exists()
-
-
-def test_invalid_schema_refetch_and_log(tmp_path):
-    raw_dir = tmp_path / "raw"
-    raw_dir.mkdir()
-    cache_path = raw_dir / "feed_2024-01-01_2024-01-07.json"
-    cache_path.write_text(json.dumps({"foo": "bar"}))
-
-    calls = {"count": 0}
-
-    def fake_fetcher(session, start_date, end_date, api_key):
-        calls["count"] += 1
-        return {"near_earth_objects": {}}
-
-    result = ingest.fetch_or_load_chunk(
-        session=None,
-        start_date=date(2024, 1, 1),
-        end_date=date(2024, 1, 7),
-        api_key="demo",
-        raw_dir=raw_dir,
-        refresh=False,
-        fetcher=fake_fetcher,
-    )
-
-    assert calls["count"] == 1
-    assert result == cache_path
-    failures_path = raw_dir / "failures.csv"
-    assert failures_path.exists()
-
-
-def test_good_cache_skip_fetch(tmp_path):
-    raw_dir = tmp_path / "raw"
-    raw_dir.mkdir()
-    cache_path = raw_dir / "feed_2024-01-01_2024-01-07.json"
-    cache_path.write_text(json.dumps({"near_earth_objects": {}}))
-
-    calls = {"count": 0}
-
-    def fake_fetcher(session, start_date, end_date, api_key):
-        calls["count"] += 1
-        return {"near_earth_objects": {}}
-
-    result = ingest.fetch_or_load_chunk(
-        session=None,
-        start_date=date(2024, 1, 1),
-        end_date=date(2024, 1, 7),
-        api_key="demo",
-        raw_dir=raw_dir,
-        refresh=False,
-        fetcher=fake_fetcher,
-    )
-
-    assert calls["count"] == 0
+    assert calls["count"] == expected_calls
     assert result == cache_path
+    assert (raw_dir / "failures.csv").exists() == logs_failure
 
 
 def test_failure_logging_includes_retry_context(tmp_path):
@@ -215,3 +182,169 @@ def test_failure_logging_includes_retry_context(tmp_path):
     assert rows[0].startswith("start_date,end_date,error,category,http_status,retry_attempt,max_retries")
     assert "throttle" in rows[1]
     assert "429" in rows[1]
+
+
+def test_ingest_concurrent_chunks_keep_order(tmp_path, monkeypatch):
+    monkeypatch.setenv("NASA_API_KEY", "demo")
+    monkeypatch.setattr(ingest, "RAW_DIR", tmp_path)
+    start = date(2024, 1, 1)
+    end = date(2024, 1, 21)
+    for chunk_start, chunk_end in ingest.chunk_date_ranges(start, end):
+        cache_path = (
+            tmp_path / f"feed_{chunk_start.isoformat()}_{chunk_end.isoformat()}.json"
+        )
+        approach = {
+            "close_approach_date": chunk_start.isoformat(),
+            "orbiting_body": "Earth",
+        }
+        payload = {
+            "near_earth_objects": {
+                chunk_start.isoformat(): [
+                    {"id": chunk_start.isoformat(), "close_approach_data": [approach]}
+                ]
+            }
+        }
+        cache_path.write_text(json.dumps(payload))
+
+    df = ingest.ingest(
+        start_date=start,
+        end_date=end,
+        orbiting_body="Earth",
+        out_path=tmp_path / "out.csv",
+        refresh=False,
+        raw_dir=tmp_path,
+        max_workers=3,
+    )
+
+    assert df["id"].tolist() == ["2024-01-01", "2024-01-08", "2024-01-15"]
+
+
+def test_write_csv_from_cache_streams_every_chunk(tmp_path):
+    cache_paths = []
+    for day in ["2024-01-01", "2024-01-08"]:
+        cache_path = tmp_path / f"feed_{day}_{day}.json"
+        approach = {"close_approach_date": day, "orbiting_body": "Earth"}
+        payload = {
+            "near_earth_objects": {
+                day: [{"id": day, "close_approach_data": [approach]}]
+            }
+        }
+        cache_path.write_text(json.dumps(payload))
+        cache_paths.append(cache_path)
+
+    out_path = tmp_path / "out.csv"
+    result = ingest.write_csv_from_cache(cache_paths, "Earth", out_path)
+
+    assert result is None
+    lines = out_path.read_text().splitlines()
+    assert lines[0] == ",".join(ingest.SCHEMA_COLUMNS)
+    assert len(lines) == 3
+
+
+def test_write_csv_from_cache_empty_writes_header(tmp_path):
+    out_path = tmp_path / "out.csv"
+    df = ingest.write_csv_from_cache([], "Earth", out_path, keep_frames=True)
+    assert df.empty
+    assert list(df.columns) == ingest.SCHEMA_COLUMNS
+    assert out_path.read_text().splitlines() == [",".join(ingest.SCHEMA_COLUMNS)]
+
+
+def test_parquet_output_builds_same_tables_as_csv(tmp_path):
+    import pandas as pd
+
+    from asteroid_analysis.build import build_tables
+
+    fixture = pd.read_csv(
+        "tests/fixtures/asteroid_data_sample.csv",
+        dtype={"id": "str", "neo_reference_id": "str"},
+    )
+    # An all-null week must still match the fixed parquet schema.
+    empty_week = pd.DataFrame({"orbiting_body": ["Earth"]})
+    frames = [fixture.iloc[:5], empty_week, fixture.iloc[5:]]
+    for suffix in ["csv", "parquet"]:
+        out_path = tmp_path / f"out.{suffix}"
+        ingest._write_frames(frames, "Earth", out_path, keep_frames=False)
+        build_tables(out_path, tmp_path / suffix)
+
+    assert pd.read_parquet(tmp_path / "out.parquet").columns.tolist() == (
+        ingest.SCHEMA_COLUMNS
+    )
+    for name in ["objects", "approaches", "aggregates"]:
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(tmp_path / "csv" / f"{name}.parquet"),
+            pd.read_parquet(tmp_path / "parquet" / f"{name}.parquet"),
+        )
+
+
+def test_build_dataframe_coerces_malformed_numbers(tmp_path):
+    cache_path = tmp_path / "feed_2024-01-01_2024-01-07.json"
+    approach = {
+        "close_approach_date": "2024-01-01",
+        "relative_velocity": {"kilometers_per_second": "fast"},
+        "miss_distance": {"kilometers": "1500000"},
+        "orbiting_body": "Earth",
+    }
+    payload = {
+        "near_earth_objects": {
+            "2024-01-01": [{"id": "1", "close_approach_data": [approach]}]
+        }
+    }
+    cache_path.write_text(json.dumps(payload))
+
+    df = ingest.build_dataframe_from_cache([cache_path], "Earth")
+
+    assert df["velocity_km_s"].isna().all()
+    assert df["miss_distance_km"].iloc[0] == 1500000.0
+    assert df["miss_distance_km"].dtype == "float64"
+
+
+def test_fetch_chunk_decodes_response_bytes():
+    class FakeResponse:
+        status_code = 200
+        content = b'{"near_earth_objects": {}}'
+
+    class FakeSession:
+        def get(self, url, params, timeout):
+            return FakeResponse()
+
+    payload = ingest.fetch_chunk(
+        FakeSession(), date(2024, 1, 1), date(2024, 1, 7), "demo"
+    )
+    assert payload == {"near_earth_objects": {}}
+
+
+def test_build_session_pools_and_requests_gzip():
+    with ingest.build_session(max_workers=4) as session:
+        adapter = session.get_adapter(ingest.FEED_URL)
+        assert adapter._pool_maxsize == 4
+        assert session.headers["Accept-Encoding"] == "gzip"
+
+
+def test_output_format_must_match_out_suffix(tmp_path):
+    csv_path = tmp_path / "asteroid_data_full.csv"
+    parquet_path = tmp_path / "asteroid_data_full.parquet"
+
+    assert ingest.check_output_format(csv_path, None) == csv_path
+    assert ingest.check_output_format(csv_path, "csv") == csv_path
+    assert ingest.check_output_format(parquet_path, "parquet") == parquet_path
+    with pytest.raises(ValueError, match="does not match"):
+        ingest.check_output_format(csv_path, "parquet")
+    with pytest.raises(ValueError, match="does not match"):
+        ingest.check_output_format(parquet_path, "csv")
+
+
+def test_map_bounded_keeps_order_and_limits_in_flight():
+    from concurrent.futures import ThreadPoolExecutor
+
+    submitted = []
+
+    def work(item):
+        submitted.append(item)
+        return item * 2
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = ingest._map_bounded(executor, work, range(6), window=2)
+        assert next(results) == 0
+        # Only the window is submitted before the first result is consumed.
+        assert len(submitted) <= 3
+        assert list(results) == [2, 4, 6, 8, 10]
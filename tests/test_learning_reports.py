@@ -1,21 +1,14 @@
+import shutil
 from datetime import datetime
-from pathlib import Path
 
 import pandas as pd
 
-from asteroid_analysis import build
 from asteroid_analysis import learning_reports
 
 
-FIXTURE_PATH = Path("tests/fixtures/asteroid_data_sample.csv")
-
-
-def test_learning_reports_outputs_and_watchlist_sort(tmp_path):
-    input_path = tmp_path / "asteroid_data_sample.csv"
-    input_path.write_text(FIXTURE_PATH.read_text())
-
+def test_learning_reports_outputs_and_watchlist_sort(tmp_path, processed_tables):
     processed_dir = tmp_path / "processed"
-    build.build_tables(input_path, processed_dir)
+    shutil.copytree(processed_tables[1], processed_dir)
 
     orbits = pd.DataFrame(
         {
@@ -41,7 +34,65 @@ def test_learning_reports_outputs_and_watchlist_sort(tmp_path):
     assert "orbit_class" in watchlist.columns
     assert "moid_au" in watchlist.columns
 
-    assert (outdir / "near_misses_under_5LD.html").exists()
-    assert (outdir / "hazard_vs_size_bins.html").exists()
-    assert (outdir / "moid_vs_miss_distance.html").exists()
-    assert (outdir / "interpretation_notes.md").exists()
+    assert {
+        "near_misses_under_5LD.html",
+        "hazard_vs_size_bins.html",
+        "moid_vs_miss_distance.html",
+        "interpretation_notes.md",
+    } <= {path.name for path in outdir.iterdir()}
+
+
+def test_load_processed_reuses_frame_until_tables_change(tmp_path, processed_tables):
+    processed_dir = tmp_path / "processed"
+    shutil.copytree(processed_tables[1], processed_dir)
+
+    first = learning_reports.load_processed(processed_dir, "Earth")
+    first["extra"] = 1
+    second = learning_reports.load_processed(processed_dir, "Earth")
+    assert "extra" not in second.columns
+    assert "minimum_orbit_intersection" not in second.columns
+
+    orbits = pd.DataFrame(
+        {
+            "id": ["1001"],
+            "orbit_class_name": ["Apollo"],
+            "minimum_orbit_intersection": [0.01],
+        }
+    )
+    orbits.to_parquet(processed_dir / "orbits.parquet", index=False)
+    third = learning_reports.load_processed(processed_dir, "Earth")
+    assert "minimum_orbit_intersection" in third.columns
+
+
+def test_near_miss_scatter_is_capped(tmp_path, monkeypatch, processed_tables):
+    _, processed_dir = processed_tables
+    monkeypatch.setattr(learning_reports, "SCATTER_POINT_LIMIT", 1)
+
+    outdir = tmp_path / "learning"
+    learning_reports.build_learning_reports(
+        outdir=outdir,
+        data_dir=processed_dir,
+        orbiting_body="Earth",
+        as_of_date=datetime(2029, 1, 1),
+    )
+
+    html = (outdir / "near_misses_under_5LD.html").read_text()
+    assert "(1 of " in html
+
+
+def test_watchlist_top_k_keeps_closest_rows(tmp_path, processed_tables):
+    _, processed_dir = processed_tables
+
+    for name, top_k in [("full", None), ("top", 1)]:
+        learning_reports.build_learning_reports(
+            outdir=tmp_path / name,
+            data_dir=processed_dir,
+            orbiting_body="Earth",
+            as_of_date=datetime(2029, 1, 1),
+            watchlist_top_k=top_k,
+        )
+
+    full = pd.read_csv(tmp_path / "full" / "watchlist_next_90_days.csv")
+    top = pd.read_csv(tmp_path / "top" / "watchlist_next_90_days.csv")
+    assert len(full) > 1
+    pd.testing.assert_frame_equal(top, full.head(1))
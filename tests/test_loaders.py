@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pandas as pd
+from pandas.api import types as ptypes
+
+from asteroid_analysis.loaders import (
+    load_clean,
+    parquet_sibling,
+    read_asteroid_csv,
+    read_asteroid_data,
+)
+
+FIXTURE_PATH = Path("tests/fixtures/asteroid_data_sample.csv")
+
+
+def test_read_asteroid_csv_projects_types_and_filters():
+    df = read_asteroid_csv(
+        FIXTURE_PATH,
+        columns=["name", "close_approach_date", "miss_distance_km"],
+        date_columns=["close_approach_date"],
+        filters={"is_potentially_hazardous_asteroid": True},
+    )
+
+    assert list(df.columns) == ["name", "close_approach_date", "miss_distance_km"]
+    assert ptypes.is_datetime64_any_dtype(df["close_approach_date"])
+    assert ptypes.is_float_dtype(df["miss_distance_km"])
+    assert "Test B" not in set(df["name"])
+    assert not df.empty
+    assert isinstance(df["name"].dtype, pd.CategoricalDtype)
+
+
+def test_read_asteroid_csv_bool_flags_have_no_nulls():
+    df = read_asteroid_csv(FIXTURE_PATH)
+    assert ptypes.is_bool_dtype(df["is_potentially_hazardous_asteroid"])
+    assert ptypes.is_bool_dtype(df["is_sentry_object"])
+    assert isinstance(df["orbiting_body"].dtype, pd.CategoricalDtype)
+
+
+def test_read_asteroid_data_prefers_fresh_parquet(tmp_path):
+    csv_path = tmp_path / "asteroid_data_full.csv"
+    csv_path.write_text(FIXTURE_PATH.read_text())
+    df = read_asteroid_csv(csv_path)
+    df["name"] = "From parquet"
+    df.to_parquet(parquet_sibling(csv_path), index=False)
+
+    loaded = read_asteroid_data(
+        csv_path,
+        columns=["name", "close_approach_date"],
+        date_columns=["close_approach_date"],
+        filters={"is_potentially_hazardous_asteroid": True},
+    )
+
+    assert set(loaded["name"]) == {"From parquet"}
+    assert list(loaded.columns) == ["name", "close_approach_date"]
+    assert ptypes.is_datetime64_any_dtype(loaded["close_approach_date"])
+    assert len(loaded) == int(df["is_potentially_hazardous_asteroid"].sum())
+
+
+def test_load_clean_parses_once_per_path(tmp_path):
+    csv_path = tmp_path / "asteroid_data_full.csv"
+    csv_path.write_text(FIXTURE_PATH.read_text())
+    load_clean.cache_clear()
+
+    first = load_clean(csv_path)
+    second = load_clean(csv_path)
+
+    assert first is second
+    assert ptypes.is_datetime64_any_dtype(first["close_approach_date"])
+    load_clean.cache_clear()
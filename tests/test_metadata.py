@@ -1,31 +1,69 @@
+import hashlib
 import json
+import shutil
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
+
 from asteroid_analysis import build
-from asteroid_analysis.metadata import _hash_file
+from asteroid_analysis.metadata import _hash_file, build_metadata
 
 
 FIXTURE_PATH = Path("tests/fixtures/asteroid_data_sample.csv")
 
 
-def test_input_hash_stable(tmp_path):
-    sample_path = tmp_path / "asteroid_data_sample.csv"
-    sample_path.write_text(FIXTURE_PATH.read_text())
+def test_input_hash_stable():
+    expected = hashlib.sha256(FIXTURE_PATH.read_bytes()).hexdigest()
 
-    first_hash = _hash_file(sample_path)
-    second_hash = _hash_file(sample_path)
+    assert _hash_file(FIXTURE_PATH) == expected
+    assert _hash_file(FIXTURE_PATH.with_name("missing.csv")) == ""
 
-    assert first_hash == second_hash
-    assert first_hash != ""
 
+def test_metadata_duplicate_count_matches_warning(processed_tables):
+    input_path, outdir = processed_tables
 
-def test_metadata_duplicate_count_matches_warning(tmp_path):
-    input_path = tmp_path / "asteroid_data_sample.csv"
-    input_path.write_text(FIXTURE_PATH.read_text())
+    metadata = json.loads((outdir / "metadata.json").read_text())
+    assert metadata["duplicate_approach_id_count"] == 1
+    assert metadata["input_csv_hash"] == _hash_file(input_path)
 
+
+def test_build_skipped_when_input_unchanged(tmp_path, capsys):
+    input_path = tmp_path / "asteroid_data_sample.csv"
+    shutil.copyfile(FIXTURE_PATH, input_path)
     outdir = tmp_path / "processed"
     build.build_tables(input_path, outdir)
+    generated_at = json.loads((outdir / "metadata.json").read_text())["generated_at"]
+    capsys.readouterr()
 
+    build.build_tables(input_path, outdir)
+    assert "Input unchanged" in capsys.readouterr().out
     metadata = json.loads((outdir / "metadata.json").read_text())
-    assert metadata["duplicate_approach_id_count"] == 1
-    assert metadata["input_csv_hash"] == _hash_file(input_path)
+    assert metadata["generated_at"] == generated_at
+
+    build.build_tables(input_path, outdir, emit_csv=True)
+    assert (outdir / "objects.csv").exists()
+
+    build.build_tables(input_path, outdir, force=True)
+    metadata = json.loads((outdir / "metadata.json").read_text())
+    assert metadata["generated_at"] != generated_at
+
+
+def test_metadata_counts_skip_missing_flags():
+    df = pd.DataFrame(
+        {
+            "id": ["1", "1", "2", "3"],
+            "close_approach_date": pd.to_datetime(
+                ["2024-01-01", "2024-02-01", "2024-01-05", "2024-01-09"]
+            ),
+            "is_potentially_hazardous_asteroid": [np.nan, True, np.nan, False],
+            "is_sentry_object": pd.array([pd.NA, True, pd.NA, False], dtype="boolean"),
+        }
+    )
+
+    metadata = build_metadata(df, Path("input.csv"), "Earth", "", "data/raw", 0)
+
+    assert metadata.hazardous_approaches == 1
+    assert metadata.hazardous_objects == 0
+    assert metadata.sentry_objects == 0
+    assert metadata.unique_objects == 3
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pandas as pd
+import pytest
 from pandas.api import types as ptypes
 
 from asteroid_analysis import build, reports
@@ -9,13 +10,14 @@ from asteroid_analysis import build, reports
 FIXTURE_PATH = Path("tests/fixtures/asteroid_data_sample.csv")
 
 
-def _load_fixture_df():
-    return pd.read_csv(FIXTURE_PATH)
+@pytest.fixture(scope="module")
+def processed():
+    # The checks below only read the built tables, so one build is shared.
+    return build.process_dataframe(pd.read_csv(FIXTURE_PATH))
 
 
-def test_build_outputs_schema_and_types():
-    df = _load_fixture_df()
-    objects, approaches = build.process_dataframe(df)
+def test_build_outputs_schema_and_types(processed):
+    objects, approaches = processed
 
     expected_objects = set(build.OBJECT_COLUMNS)
     expected_approaches = set(build.APPROACH_COLUMNS) | {
@@ -34,33 +36,27 @@ def test_build_outputs_schema_and_types():
     assert str(approaches["orbiting_body"].dtype) == "category"
 
 
-def test_no_negative_distances_or_velocities():
-    df = _load_fixture_df()
-    _, approaches = build.process_dataframe(df)
+def test_no_negative_distances_or_velocities(processed):
+    _, approaches = processed
     assert approaches["miss_distance_km"].min() >= 0
     assert approaches["velocity_km_s"].min() >= 0
 
 
-def test_approach_id_unique_after_dedupe():
-    df = _load_fixture_df()
-    _, approaches = build.process_dataframe(df)
+def test_approach_id_unique_after_dedupe(processed):
+    _, approaches = processed
     assert approaches["approach_id"].is_unique
 
 
-def test_reports_smoke(tmp_path):
-    df = _load_fixture_df()
-    objects, approaches = build.process_dataframe(df)
-
-    data_dir = tmp_path / "data/processed"
-    data_dir.mkdir(parents=True)
-    objects.to_parquet(data_dir / "objects.parquet", index=False)
-    approaches.to_parquet(data_dir / "approaches.parquet", index=False)
+def test_reports_smoke(tmp_path, processed_tables):
+    _, data_dir = processed_tables
 
     outdir = tmp_path / "outputs/reports"
     reports.build_reports(outdir, "Earth", data_dir)
 
-    assert (outdir / "miss_distance_quantiles.png").exists()
-    assert (outdir / "miss_distance_quantiles.html").exists()
-    assert (outdir / "miss_distance_ecdf.png").exists()
-    assert (outdir / "miss_distance_ecdf.html").exists()
-    assert (outdir / "approaches_calendar_heatmap.html").exists()
+    assert {
+        "miss_distance_quantiles.png",
+        "miss_distance_quantiles.html",
+        "miss_distance_ecdf.png",
+        "miss_distance_ecdf.html",
+        "approaches_calendar_heatmap.html",
+    } <= {path.name for path in outdir.iterdir()}
@@ -39,3 +39,12 @@ def test_reports_missing_parquet(tmp_path):
     with pytest.raises(FileNotFoundError) as excinfo:
         reports.load_joined(data_dir)
     assert "python -m asteroid_analysis.build" in str(excinfo.value)
+
+
+def test_load_joined_reads_only_report_columns(processed_tables):
+    _, data_dir = processed_tables
+
+    df = reports.load_joined(data_dir, "Earth")
+
+    assert list(df.columns) == reports.APPROACH_COLUMNS
+    assert not df.empty